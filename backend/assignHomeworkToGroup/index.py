@@ -1,240 +1,625 @@
+import base64
+import contextlib
+import datetime
+import decimal
+import functools
+import gzip
+import hashlib
 import json
 import os
+import re
+import threading
+import time
+from collections import OrderedDict
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
 import jwt
-from typing import Dict, Any
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import orjson
+except ImportError:
+    orjson = None
+from typing import Dict, Any, Optional, List, Callable, Tuple, Sequence, Set, Iterator
 
-def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+DB_POOL_MAX_CONNECTIONS = int(os.environ.get('DB_POOL_MAX_CONNECTIONS', '4'))
+DB_POOL_IDLE_CHECK_SECONDS = 30
+
+_db_pool: Optional[ThreadedConnectionPool] = None
+_db_last_used: Dict[int, float] = {}
+_db_pool_lock = threading.Lock()
+
+def get_connection(database_url: str) -> Any:
     '''
-    Business: Assign homework set to all students in group
-    Args: event with httpMethod, headers with X-Auth-Token, body with set_id and group_id
-          context with request_id
-    Returns: HTTP response with created variants count
+    Business: Borrow connection from pool kept warm between invocations
+    Args: database_url used to create the pool on cold start
+    Returns: open psycopg2 connection, stale ones are transparently replaced
     '''
-    method: str = event.get('httpMethod', 'POST')
+    global _db_pool
+    if _db_pool is None or _db_pool.closed:
+        with _db_pool_lock:
+            if _db_pool is None or _db_pool.closed:
+                _db_pool = ThreadedConnectionPool(1, DB_POOL_MAX_CONNECTIONS, database_url, connection_factory=InstrumentedConnection)
     
-    if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, X-Auth-Token',
-                'Access-Control-Max-Age': '86400'
-            },
-            'body': '',
-            'isBase64Encoded': False
-        }
+    for _ in range(DB_POOL_MAX_CONNECTIONS + 1):
+        conn = _db_pool.getconn()
+        last_used = _db_last_used.get(id(conn))
+        
+        if not conn.closed and (last_used is None or time.monotonic() - last_used < DB_POOL_IDLE_CHECK_SECONDS):
+            return conn
+        
+        if not conn.closed:
+            try:
+                with conn.cursor() as check_cursor:
+                    check_cursor.execute('SELECT 1')
+                conn.rollback()
+                return conn
+            except psycopg2.Error:
+                pass
+        
+        _db_last_used.pop(id(conn), None)
+        _db_pool.putconn(conn, close=True)
     
-    if method != 'POST':
-        return {
-            'statusCode': 405,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Method not allowed'}),
-            'isBase64Encoded': False
-        }
+    raise psycopg2.OperationalError('No healthy database connection available')
+
+def release_connection(conn: Any) -> None:
+    '''
+    Business: Return connection to pool, rolling back any unfinished transaction
+    Args: conn previously borrowed with get_connection
+    Returns: None
+    '''
+    if _db_pool is None or _db_pool.closed:
+        conn.close()
+        return
     
-    headers = event.get('headers', {})
-    token = headers.get('X-Auth-Token') or headers.get('x-auth-token')
+    if not conn.closed and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+        try:
+            conn.rollback()
+        except psycopg2.Error:
+            conn.close()
     
-    if not token:
-        return {
-            'statusCode': 401,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Токен не предоставлен'}),
-            'isBase64Encoded': False
-        }
+    if conn.closed:
+        _db_last_used.pop(id(conn), None)
+        _db_pool.putconn(conn, close=True)
+    else:
+        _db_last_used[id(conn)] = time.monotonic()
+        _db_pool.putconn(conn)
+
+@contextlib.contextmanager
+def db_connection(database_url: str) -> Iterator[Any]:
+    '''
+    Business: Borrow a pooled connection for a with block and give it back on every path
+    Args: database_url for the pool
+    Returns: context manager yielding the connection, rolled back and released on exit even when the block raises
+    '''
+    conn = get_connection(database_url)
+    try:
+        yield conn
+    finally:
+        release_connection(conn)
+
+QUERY_STATS_ENABLED = os.environ.get('QUERY_STATS_ENABLED', '1') != '0'
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '200'))
+QUERY_STATS_TOP = 3
+QUERY_LOG_SQL_LENGTH = 500
+
+_request_stats = threading.local()
+_instrumented_cursor_classes: Dict[type, type] = {}
+
+def normalize_sql(query: Any) -> str:
+    '''
+    Business: Replace literals in executed SQL so statements of one shape group together in logs
+    Args: query as sent to the server (str or bytes)
+    Returns: single-line SQL with ? instead of strings, numbers and value lists,
+             EXECUTE of a prepared statement is shown as the prepared query
+    '''
+    text = query.decode('utf-8', 'replace') if isinstance(query, bytes) else str(query)
+    prepared = re.match(r'EXECUTE (stmt_\w+)', text)
+    if prepared and prepared.group(1) in _prepared_queries:
+        text = _prepared_queries[prepared.group(1)]
+    text = re.sub(r"'(?:[^']|'')*'", '?', text)
+    text = re.sub(r'\b\d+(?:\.\d+)?\b', '?', text)
+    text = re.sub(r'\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+', '(?), ...', text)
+    text = re.sub(r'\?(?:\s*,\s*\?)+', '?, ...', text)
+    return ' '.join(text.split())[:QUERY_LOG_SQL_LENGTH]
+
+def record_query(cursor: Any, elapsed: float) -> None:
+    '''
+    Business: Add one executed statement to the stats of the request running in this thread
+    Args: cursor that executed it, elapsed seconds
+    Returns: None, statements slower than SLOW_QUERY_MS are logged right away
+    '''
+    stats = getattr(_request_stats, 'current', None)
+    if stats is None:
+        return
     
-    jwt_secret = os.environ.get('JWT_SECRET')
-    database_url = os.environ.get('DATABASE_URL')
+    elapsed_ms = elapsed * 1000
+    rows = max(cursor.rowcount, 0)
+    stats['statements'] += 1
+    stats['db_time_ms'] += elapsed_ms
+    stats['rows'] += rows
     
-    if not jwt_secret or not database_url:
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Server configuration error'}),
-            'isBase64Encoded': False
-        }
+    slowest = stats['slowest']
+    if len(slowest) < QUERY_STATS_TOP or elapsed_ms > slowest[-1][0]:
+        slowest.append((elapsed_ms, cursor.query, rows))
+        slowest.sort(key=lambda entry: entry[0], reverse=True)
+        del slowest[QUERY_STATS_TOP:]
     
-    try:
-        payload = jwt.decode(token, jwt_secret, algorithms=['HS256'])
-        teacher_id = payload.get('id')
-        role = payload.get('role')
-        
-        if role != 'teacher':
-            return {
-                'statusCode': 403,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({'error': 'Доступ запрещен'}),
-                'isBase64Encoded': False
-            }
-    except:
-        return {
-            'statusCode': 401,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Неверный токен'}),
-            'isBase64Encoded': False
-        }
+    if elapsed_ms >= SLOW_QUERY_MS:
+        print(json.dumps({
+            'type': 'slow_query',
+            'request_id': stats['request_id'],
+            'function': stats['function'],
+            'ms': round(elapsed_ms, 2),
+            'rows': rows,
+            'sql': normalize_sql(cursor.query)
+        }, ensure_ascii=False))
+
+class InstrumentedCursorMixin:
+    '''
+    Business: Time execute, executemany and copy_expert of any psycopg2 cursor class
+    Args: mixed in front of the cursor class requested by the handler
+    Returns: cursor that reports every statement to record_query
+    '''
+    def execute(self, query: Any, vars: Any = None) -> Any:
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            record_query(self, time.perf_counter() - started)
     
-    body_data = json.loads(event.get('body', '{}'))
-    set_id: int = body_data.get('set_id')
-    group_id: int = body_data.get('group_id')
+    def executemany(self, query: Any, vars_list: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            record_query(self, time.perf_counter() - started)
     
-    if not set_id or not group_id:
-        return {
-            'statusCode': 400,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Укажите set_id и group_id'}),
-            'isBase64Encoded': False
-        }
+    def copy_expert(self, sql: Any, file: Any, size: int = 8192) -> Any:
+        started = time.perf_counter()
+        try:
+            return super().copy_expert(sql, file, size)
+        finally:
+            record_query(self, time.perf_counter() - started)
+
+class InstrumentedConnection(psycopg2.extensions.connection):
+    '''
+    Business: Connection whose cursors are instrumented whatever cursor_factory the handler passes
+    Args: same as psycopg2.connect, used as connection_factory of the pool
+    Returns: psycopg2 connection with the set of statements prepared on it
+    '''
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.prepared_statements: Set[str] = set()
     
-    conn = psycopg2.connect(database_url)
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    def cursor(self, *args: Any, **kwargs: Any) -> Any:
+        base_class = kwargs.get('cursor_factory') or self.cursor_factory or psycopg2.extensions.cursor
+        if not issubclass(base_class, InstrumentedCursorMixin):
+            instrumented_class = _instrumented_cursor_classes.get(base_class)
+            if instrumented_class is None:
+                instrumented_class = type(f'Instrumented{base_class.__name__}', (InstrumentedCursorMixin, base_class), {})
+                _instrumented_cursor_classes[base_class] = instrumented_class
+            kwargs['cursor_factory'] = instrumented_class
+        return super().cursor(*args, **kwargs)
+
+PREPARED_STATEMENTS_ENABLED = os.environ.get('PREPARED_STATEMENTS_ENABLED', '1') != '0'
+
+_prepared_queries: Dict[str, str] = {}
+
+def positional_sql(query: str) -> str:
+    '''
+    Business: Convert psycopg2 placeholders to the $n form PREPARE expects
+    Args: query with %s placeholders and %% for a literal percent sign
+    Returns: query with $1, $2, ... in placeholder order
+    '''
+    counter = iter(range(1, query.count('%s') + 1))
+    return re.sub(r'%%|%s', lambda match: '%' if match.group(0) == '%%' else f'${next(counter)}', query)
+
+def execute_prepared(cursor: Any, query: str, params: Sequence[Any] = ()) -> None:
+    '''
+    Business: Run a hot statement through a server-side prepared statement so its plan is reused
+    Args: cursor of a pooled connection, query with %s placeholders, params in placeholder order
+    Returns: None, rows are fetched from cursor as after cursor.execute
+    '''
+    prepared = getattr(cursor.connection, 'prepared_statements', None)
+    if not PREPARED_STATEMENTS_ENABLED or prepared is None:
+        cursor.execute(query, params)
+        return
     
-    cursor.execute(f"SELECT teacher_id FROM groups WHERE id = {group_id}")
-    group = cursor.fetchone()
+    name = 'stmt_' + hashlib.md5(query.encode('utf-8')).hexdigest()[:16]
+    if name not in prepared:
+        cursor.execute(f"PREPARE {name} AS {positional_sql(query)}")
+        prepared.add(name)
+        _prepared_queries[name] = query
     
-    if not group:
-        cursor.close()
-        conn.close()
-        return {
-            'statusCode': 404,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Группа не найдена'}),
-            'isBase64Encoded': False
+    placeholders = f" ({', '.join(['%s'] * len(params))})" if params else ''
+    cursor.execute(f"EXECUTE {name}{placeholders}", params)
+
+def track_queries(func: Callable) -> Callable:
+    '''
+    Business: Collect statement count, DB time, rows and slowest statements of one invocation
+    Args: handler(event, context) to wrap
+    Returns: handler that prints one db_stats JSON line keyed by context.request_id
+    '''
+    @functools.wraps(func)
+    def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+        if not QUERY_STATS_ENABLED:
+            return func(event, context)
+        
+        stats: Dict[str, Any] = {
+            'request_id': getattr(context, 'request_id', None),
+            'function': getattr(context, 'function_name', None),
+            'statements': 0,
+            'db_time_ms': 0.0,
+            'rows': 0,
+            'slowest': []
         }
+        _request_stats.current = stats
+        started = time.perf_counter()
+        status_code = 500
+        
+        try:
+            response = func(event, context)
+            status_code = response.get('statusCode', 200)
+            return response
+        finally:
+            _request_stats.current = None
+            print(json.dumps({
+                'type': 'db_stats',
+                'request_id': stats['request_id'],
+                'function': stats['function'],
+                'status': status_code,
+                'statements': stats['statements'],
+                'db_time_ms': round(stats['db_time_ms'], 2),
+                'total_time_ms': round((time.perf_counter() - started) * 1000, 2),
+                'rows': stats['rows'],
+                'slowest': [
+                    {'ms': round(elapsed_ms, 2), 'rows': rows, 'sql': normalize_sql(query)}
+                    for elapsed_ms, query, rows in stats['slowest']
+                ]
+            }, ensure_ascii=False))
     
-    if group['teacher_id'] != teacher_id:
-        cursor.close()
-        conn.close()
-        return {
-            'statusCode': 403,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Группа не принадлежит вам'}),
-            'isBase64Encoded': False
+    return wrapper
+
+TOKEN_CACHE_SIZE = 1024
+
+_config: Optional[Dict[str, Optional[str]]] = None
+_token_cache: 'OrderedDict[bytes, Tuple[Dict[str, Any], Optional[float]]]' = OrderedDict()
+_token_cache_lock = threading.Lock()
+
+def get_config() -> Dict[str, Optional[str]]:
+    '''
+    Business: Resolve environment configuration once per warm container
+    Args: None
+    Returns: dict with jwt_secret and database_url
+    '''
+    global _config
+    if _config is None:
+        _config = {
+            'jwt_secret': os.environ.get('JWT_SECRET'),
+            'database_url': os.environ.get('DATABASE_URL')
         }
+    return _config
+
+def json_default(value: Any) -> Any:
+    '''
+    Business: Convert database values the JSON encoder does not handle by itself
+    Args: value such as Decimal, datetime or date from a row
+    Returns: JSON-compatible value
+    '''
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+def dumps_json(data: Any) -> str:
+    '''
+    Business: Serialize response data with orjson when installed, stdlib json otherwise
+    Args: data with dicts, lists and database rows, datetime values are written as ISO 8601
+    Returns: JSON text
+    '''
+    if orjson is not None:
+        return orjson.dumps(data, default=json_default).decode('utf-8')
+    return json.dumps(data, default=json_default, ensure_ascii=False)
+
+def splice_json(body: str, raw_fields: Dict[str, str]) -> str:
+    '''
+    Business: Add members whose values are JSON text built by Postgres to a serialized object
+    Args: body with a serialized JSON object, raw_fields of member name to JSON text
+    Returns: JSON object text with the extra members, raw values are not parsed
+    '''
+    members = ','.join(f'{dumps_json(name)}:{text}' for name, text in raw_fields.items())
+    return body[:-1] + (',' if body != '{}' else '') + members + '}'
+
+def json_response(status_code: int, data: Any, headers: Optional[Dict[str, str]] = None,
+                  raw_fields: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    '''
+    Business: Build HTTP response with JSON body and CORS header
+    Args: status_code, data serializable with dumps_json, optional extra headers and
+          raw_fields with JSON text added to the body as is
+    Returns: response dict in the format expected by the function runtime
+    '''
+    body = dumps_json(data)
+    if raw_fields:
+        body = splice_json(body, raw_fields)
     
-    cursor.execute(f"SELECT created_by FROM homework_sets WHERE id = {set_id}")
-    hw_set = cursor.fetchone()
+    return {
+        'statusCode': status_code,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            **(headers or {})
+        },
+        'body': body,
+        'isBase64Encoded': False
+    }
+
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', '1024'))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+def choose_encoding(event: Dict[str, Any]) -> Optional[str]:
+    '''
+    Business: Pick the best content encoding the client accepts
+    Args: event with Accept-Encoding header
+    Returns: 'br', 'gzip' or None for an uncompressed body
+    '''
+    headers = event.get('headers') or {}
+    header = headers.get('Accept-Encoding') or headers.get('accept-encoding') or ''
+    accepted: Dict[str, float] = {}
     
-    if not hw_set:
-        cursor.close()
-        conn.close()
-        return {
-            'statusCode': 404,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'ДЗ не найдено'}),
-            'isBase64Encoded': False
-        }
+    for item in header.split(','):
+        name, _, params = item.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
     
-    if hw_set['created_by'] != teacher_id:
-        cursor.close()
-        conn.close()
+    for encoding in (['br'] if brotli is not None else []) + ['gzip']:
+        if accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+            return encoding
+    return None
+
+def compress_response(func: Callable) -> Callable:
+    '''
+    Business: Compress large JSON bodies with brotli or gzip according to Accept-Encoding
+    Args: handler(event, context) returning a response dict
+    Returns: handler whose bodies above COMPRESS_MIN_BYTES are sent compressed and base64-encoded
+    '''
+    @functools.wraps(func)
+    def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+        response = func(event, context)
+        body = response.get('body')
+        
+        if response.get('isBase64Encoded') or not isinstance(body, str) or len(body) < COMPRESS_MIN_BYTES:
+            return response
+        
+        headers = {**(response.get('headers') or {}), 'Vary': 'Accept-Encoding'}
+        encoding = choose_encoding(event)
+        if encoding is None:
+            return {**response, 'headers': headers}
+        
+        raw = body.encode('utf-8')
+        if encoding == 'br':
+            compressed = brotli.compress(raw, quality=BROTLI_QUALITY)
+        else:
+            compressed = gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0)
+        
+        headers['Content-Encoding'] = encoding
         return {
-            'statusCode': 403,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'ДЗ не принадлежит вам'}),
-            'isBase64Encoded': False
+            **response,
+            'headers': headers,
+            'body': base64.b64encode(compressed).decode('ascii'),
+            'isBase64Encoded': True
         }
     
-    cursor.execute(f"""
-        SELECT u.id FROM users u
-        JOIN enrollments e ON e.student_id = u.id
-        WHERE e.group_id = {group_id} AND u.role = 'student'
-    """)
-    students = cursor.fetchall()
+    return wrapper
+
+def verify_token(token: str, jwt_secret: str) -> Dict[str, Any]:
+    '''
+    Business: Decode JWT, reusing payloads verified earlier in this container until they expire
+    Args: token from X-Auth-Token header, jwt_secret used to sign it
+    Returns: token payload, raises jwt.InvalidTokenError or jwt.ExpiredSignatureError for bad tokens
+    '''
+    digest = hashlib.sha256(token.encode()).digest()
     
-    if not students:
-        cursor.close()
-        conn.close()
-        return {
-            'statusCode': 400,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'В группе нет студентов'}),
-            'isBase64Encoded': False
-        }
+    with _token_cache_lock:
+        cached = _token_cache.get(digest)
+        if cached is not None:
+            payload, expires_at = cached
+            if expires_at is None or expires_at > time.time():
+                _token_cache.move_to_end(digest)
+                return payload
+            del _token_cache[digest]
     
-    cursor.execute(f"SELECT task_id FROM homework_tasks WHERE set_id = {set_id}")
-    tasks = cursor.fetchall()
+    payload = jwt.decode(token, jwt_secret, algorithms=['HS256'])
+    exp = payload.get('exp')
+    expires_at = float(exp) if isinstance(exp, (int, float)) else None
     
-    variants_created = 0
+    with _token_cache_lock:
+        _token_cache[digest] = (payload, expires_at)
+        if len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
     
-    for student in students:
-        student_id = student['id']
+    return payload
+
+def require_auth(method: str, roles: Optional[List[str]] = None) -> Callable:
+    '''
+    Business: Wrap handler with CORS preflight, method check, config check and cached JWT verification
+    Args: method allowed for the endpoint, roles allowed to call it (None for any signed-in user)
+    Returns: decorator turning func(event, context, user) into handler(event, context)
+    '''
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+            http_method: str = event.get('httpMethod', method)
+            
+            if http_method == 'OPTIONS':
+                return {
+                    'statusCode': 200,
+                    'headers': {
+                        'Access-Control-Allow-Origin': '*',
+                        'Access-Control-Allow-Methods': f'{method}, OPTIONS',
+                        'Access-Control-Allow-Headers': 'Content-Type, X-Auth-Token, If-None-Match',
+                        'Access-Control-Max-Age': '86400'
+                    },
+                    'body': '',
+                    'isBase64Encoded': False
+                }
+            
+            if http_method != method:
+                return json_response(405, {'error': 'Method not allowed'})
+            
+            headers = event.get('headers') or {}
+            token = headers.get('X-Auth-Token') or headers.get('x-auth-token')
+            
+            if not token:
+                return json_response(401, {'error': 'Токен не предоставлен'})
+            
+            config = get_config()
+            if not config['jwt_secret'] or not config['database_url']:
+                return json_response(500, {'error': 'Server configuration error'})
+            
+            try:
+                user = verify_token(token, config['jwt_secret'])
+            except jwt.ExpiredSignatureError:
+                return json_response(401, {'error': 'Токен истек'})
+            except jwt.InvalidTokenError:
+                return json_response(401, {'error': 'Неверный токен'})
+            
+            if roles is not None and user.get('role') not in roles:
+                return json_response(403, {'error': 'Доступ запрещен'})
+            
+            return func(event, context, user)
         
-        cursor.execute(f"""
-            SELECT id FROM homework_variants 
-            WHERE set_id = {set_id} AND student_id = {student_id}
-        """)
-        existing = cursor.fetchone()
+        return wrapper
+    
+    return decorator
+
+def parse_int_param(value: Optional[str], min_value: int, max_value: int) -> Optional[int]:
+    '''
+    Business: Parse optional integer query parameter or JSON body id within bounds
+    Args: value from query string or request body, inclusive min_value and max_value
+    Returns: parsed int or None when value is missing or invalid, booleans and fractional numbers included
+    '''
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        return None
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return None
+    return number if min_value <= number <= max_value else None
+
+@track_queries
+@compress_response
+@require_auth('POST', roles=['teacher'])
+def handler(event: Dict[str, Any], context: Any, user: Dict[str, Any]) -> Dict[str, Any]:
+    '''
+    Business: Assign homework set to all students in group
+    Args: event with httpMethod, headers with X-Auth-Token, body with set_id and group_id
+          context with request_id, user with verified token payload
+    Returns: HTTP response with created variants count
+    '''
+    teacher_id = user.get('id')
+    database_url = get_config()['database_url']
+    
+    body_data = json.loads(event.get('body', '{}'))
+    set_id = parse_int_param(body_data.get('set_id'), 1, 2147483647)
+    group_id = parse_int_param(body_data.get('group_id'), 1, 2147483647)
+    
+    if set_id is None or group_id is None:
+        return json_response(400, {'error': 'Укажите set_id и group_id'})
+    
+    with db_connection(database_url) as conn:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
         
-        if existing:
-            continue
+        cursor.execute("""
+            WITH grp AS (
+                SELECT teacher_id FROM groups WHERE id = %(group_id)s
+            ),
+            hw_set AS (
+                SELECT created_by FROM homework_sets WHERE id = %(set_id)s
+            ),
+            group_students AS (
+                SELECT u.id FROM users u
+                JOIN enrollments e ON e.student_id = u.id
+                WHERE e.group_id = %(group_id)s AND u.role = 'student'
+                  AND EXISTS (SELECT 1 FROM grp WHERE teacher_id = %(teacher_id)s)
+                  AND EXISTS (SELECT 1 FROM hw_set WHERE created_by = %(teacher_id)s)
+            ),
+            set_tasks AS (
+                SELECT COUNT(*) as task_count FROM homework_tasks WHERE set_id = %(set_id)s
+            ),
+            new_assignment AS (
+                INSERT INTO group_assignments (group_id, set_id, assigned_by)
+                SELECT %(group_id)s, %(set_id)s, %(teacher_id)s
+                WHERE EXISTS (SELECT 1 FROM grp WHERE teacher_id = %(teacher_id)s)
+                  AND EXISTS (SELECT 1 FROM hw_set WHERE created_by = %(teacher_id)s)
+                ON CONFLICT (group_id, set_id) DO NOTHING
+            ),
+            new_variants AS (
+                INSERT INTO homework_variants (set_id, student_id, status, total_tasks)
+                SELECT %(set_id)s, gs.id, 'assigned', st.task_count
+                FROM group_students gs
+                CROSS JOIN set_tasks st
+                ON CONFLICT (set_id, student_id) DO NOTHING
+                RETURNING id
+            ),
+            new_items AS (
+                INSERT INTO variant_items (variant_id, task_id)
+                SELECT nv.id, ht.task_id
+                FROM new_variants nv
+                CROSS JOIN homework_tasks ht
+                WHERE ht.set_id = %(set_id)s
+                ORDER BY nv.id, ht.task_order, ht.id
+                RETURNING id
+            )
+            SELECT 
+                EXISTS (SELECT 1 FROM grp) as group_exists,
+                (SELECT teacher_id FROM grp) as group_owner_id,
+                EXISTS (SELECT 1 FROM hw_set) as set_exists,
+                (SELECT created_by FROM hw_set) as set_owner_id,
+                (SELECT COUNT(*) FROM group_students) as total_students,
+                (SELECT COUNT(*) FROM new_variants) as variants_created,
+                (SELECT COUNT(*) FROM new_items) as items_created
+        """, {'group_id': group_id, 'set_id': set_id, 'teacher_id': teacher_id})
+        assignment = cursor.fetchone()
         
-        cursor.execute(f"""
-            INSERT INTO homework_variants (set_id, student_id, status)
-            VALUES ({set_id}, {student_id}, 'assigned')
-            RETURNING id
-        """)
-        variant = cursor.fetchone()
-        variant_id = variant['id']
+        error: Optional[Tuple[int, str]] = None
+        if not assignment['group_exists']:
+            error = (404, 'Группа не найдена')
+        elif assignment['group_owner_id'] != teacher_id:
+            error = (403, 'Группа не принадлежит вам')
+        elif not assignment['set_exists']:
+            error = (404, 'ДЗ не найдено')
+        elif assignment['set_owner_id'] != teacher_id:
+            error = (403, 'ДЗ не принадлежит вам')
         
-        for task in tasks:
-            cursor.execute(f"""
-                INSERT INTO variant_items (variant_id, task_id)
-                VALUES ({variant_id}, {task['task_id']})
-            """)
+        if error:
+            cursor.close()
+            return json_response(error[0], {'error': error[1]})
         
-        variants_created += 1
-    
-    conn.commit()
-    cursor.close()
-    conn.close()
+        if not assignment['total_students']:
+            conn.rollback()
+            cursor.close()
+            return json_response(400, {'error': 'В группе нет студентов'})
+        
+        conn.commit()
+        cursor.close()
     
-    return {
-        'statusCode': 200,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*'
-        },
-        'body': json.dumps({
-            'success': True,
-            'variants_created': variants_created,
-            'total_students': len(students)
-        }),
-        'isBase64Encoded': False
-    }
+    return json_response(200, {
+        'success': True,
+        'variants_created': assignment['variants_created'],
+        'total_students': assignment['total_students']
+    })
@@ -0,0 +1,811 @@
+import base64
+import contextlib
+import csv
+import datetime
+import decimal
+import functools
+import gzip
+import hashlib
+import io
+import itertools
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+import jwt
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+from typing import Dict, Any, List, Optional, Callable, Tuple, Sequence, Set, Iterator, Iterable
+
+DB_POOL_MAX_CONNECTIONS = int(os.environ.get('DB_POOL_MAX_CONNECTIONS', '4'))
+DB_POOL_IDLE_CHECK_SECONDS = 30
+
+_db_pool: Optional[ThreadedConnectionPool] = None
+_db_last_used: Dict[int, float] = {}
+_db_pool_lock = threading.Lock()
+
+def get_connection(database_url: str) -> Any:
+    '''
+    Business: Borrow connection from pool kept warm between invocations
+    Args: database_url used to create the pool on cold start
+    Returns: open psycopg2 connection, stale ones are transparently replaced
+    '''
+    global _db_pool
+    if _db_pool is None or _db_pool.closed:
+        with _db_pool_lock:
+            if _db_pool is None or _db_pool.closed:
+                _db_pool = ThreadedConnectionPool(1, DB_POOL_MAX_CONNECTIONS, database_url, connection_factory=InstrumentedConnection)
+    
+    for _ in range(DB_POOL_MAX_CONNECTIONS + 1):
+        conn = _db_pool.getconn()
+        last_used = _db_last_used.get(id(conn))
+        
+        if not conn.closed and (last_used is None or time.monotonic() - last_used < DB_POOL_IDLE_CHECK_SECONDS):
+            return conn
+        
+        if not conn.closed:
+            try:
+                with conn.cursor() as check_cursor:
+                    check_cursor.execute('SELECT 1')
+                conn.rollback()
+                return conn
+            except psycopg2.Error:
+                pass
+        
+        _db_last_used.pop(id(conn), None)
+        _db_pool.putconn(conn, close=True)
+    
+    raise psycopg2.OperationalError('No healthy database connection available')
+
+def release_connection(conn: Any) -> None:
+    '''
+    Business: Return connection to pool, rolling back any unfinished transaction
+    Args: conn previously borrowed with get_connection
+    Returns: None
+    '''
+    if _db_pool is None or _db_pool.closed:
+        conn.close()
+        return
+    
+    if not conn.closed and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+        try:
+            conn.rollback()
+        except psycopg2.Error:
+            conn.close()
+    
+    if conn.closed:
+        _db_last_used.pop(id(conn), None)
+        _db_pool.putconn(conn, close=True)
+    else:
+        _db_last_used[id(conn)] = time.monotonic()
+        _db_pool.putconn(conn)
+
+@contextlib.contextmanager
+def db_connection(database_url: str) -> Iterator[Any]:
+    '''
+    Business: Borrow a pooled connection for a with block and give it back on every path
+    Args: database_url for the pool
+    Returns: context manager yielding the connection, rolled back and released on exit even when the block raises
+    '''
+    conn = get_connection(database_url)
+    try:
+        yield conn
+    finally:
+        release_connection(conn)
+
+QUERY_STATS_ENABLED = os.environ.get('QUERY_STATS_ENABLED', '1') != '0'
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '200'))
+QUERY_STATS_TOP = 3
+QUERY_LOG_SQL_LENGTH = 500
+
+_request_stats = threading.local()
+_instrumented_cursor_classes: Dict[type, type] = {}
+
+def normalize_sql(query: Any) -> str:
+    '''
+    Business: Replace literals in executed SQL so statements of one shape group together in logs
+    Args: query as sent to the server (str or bytes)
+    Returns: single-line SQL with ? instead of strings, numbers and value lists,
+             EXECUTE of a prepared statement is shown as the prepared query
+    '''
+    text = query.decode('utf-8', 'replace') if isinstance(query, bytes) else str(query)
+    prepared = re.match(r'EXECUTE (stmt_\w+)', text)
+    if prepared and prepared.group(1) in _prepared_queries:
+        text = _prepared_queries[prepared.group(1)]
+    text = re.sub(r"'(?:[^']|'')*'", '?', text)
+    text = re.sub(r'\b\d+(?:\.\d+)?\b', '?', text)
+    text = re.sub(r'\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+', '(?), ...', text)
+    text = re.sub(r'\?(?:\s*,\s*\?)+', '?, ...', text)
+    return ' '.join(text.split())[:QUERY_LOG_SQL_LENGTH]
+
+def record_query(cursor: Any, elapsed: float) -> None:
+    '''
+    Business: Add one executed statement to the stats of the request running in this thread
+    Args: cursor that executed it, elapsed seconds
+    Returns: None, statements slower than SLOW_QUERY_MS are logged right away
+    '''
+    stats = getattr(_request_stats, 'current', None)
+    if stats is None:
+        return
+    
+    elapsed_ms = elapsed * 1000
+    rows = max(cursor.rowcount, 0)
+    stats['statements'] += 1
+    stats['db_time_ms'] += elapsed_ms
+    stats['rows'] += rows
+    
+    slowest = stats['slowest']
+    if len(slowest) < QUERY_STATS_TOP or elapsed_ms > slowest[-1][0]:
+        slowest.append((elapsed_ms, cursor.query, rows))
+        slowest.sort(key=lambda entry: entry[0], reverse=True)
+        del slowest[QUERY_STATS_TOP:]
+    
+    if elapsed_ms >= SLOW_QUERY_MS:
+        print(json.dumps({
+            'type': 'slow_query',
+            'request_id': stats['request_id'],
+            'function': stats['function'],
+            'ms': round(elapsed_ms, 2),
+            'rows': rows,
+            'sql': normalize_sql(cursor.query)
+        }, ensure_ascii=False))
+
+class InstrumentedCursorMixin:
+    '''
+    Business: Time execute, executemany and copy_expert of any psycopg2 cursor class
+    Args: mixed in front of the cursor class requested by the handler
+    Returns: cursor that reports every statement to record_query
+    '''
+    def execute(self, query: Any, vars: Any = None) -> Any:
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            record_query(self, time.perf_counter() - started)
+    
+    def executemany(self, query: Any, vars_list: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            record_query(self, time.perf_counter() - started)
+    
+    def copy_expert(self, sql: Any, file: Any, size: int = 8192) -> Any:
+        started = time.perf_counter()
+        try:
+            return super().copy_expert(sql, file, size)
+        finally:
+            record_query(self, time.perf_counter() - started)
+
+class InstrumentedConnection(psycopg2.extensions.connection):
+    '''
+    Business: Connection whose cursors are instrumented whatever cursor_factory the handler passes
+    Args: same as psycopg2.connect, used as connection_factory of the pool
+    Returns: psycopg2 connection with the set of statements prepared on it
+    '''
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.prepared_statements: Set[str] = set()
+    
+    def cursor(self, *args: Any, **kwargs: Any) -> Any:
+        base_class = kwargs.get('cursor_factory') or self.cursor_factory or psycopg2.extensions.cursor
+        if not issubclass(base_class, InstrumentedCursorMixin):
+            instrumented_class = _instrumented_cursor_classes.get(base_class)
+            if instrumented_class is None:
+                instrumented_class = type(f'Instrumented{base_class.__name__}', (InstrumentedCursorMixin, base_class), {})
+                _instrumented_cursor_classes[base_class] = instrumented_class
+            kwargs['cursor_factory'] = instrumented_class
+        return super().cursor(*args, **kwargs)
+
+PREPARED_STATEMENTS_ENABLED = os.environ.get('PREPARED_STATEMENTS_ENABLED', '1') != '0'
+
+_prepared_queries: Dict[str, str] = {}
+
+def positional_sql(query: str) -> str:
+    '''
+    Business: Convert psycopg2 placeholders to the $n form PREPARE expects
+    Args: query with %s placeholders and %% for a literal percent sign
+    Returns: query with $1, $2, ... in placeholder order
+    '''
+    counter = iter(range(1, query.count('%s') + 1))
+    return re.sub(r'%%|%s', lambda match: '%' if match.group(0) == '%%' else f'${next(counter)}', query)
+
+def execute_prepared(cursor: Any, query: str, params: Sequence[Any] = ()) -> None:
+    '''
+    Business: Run a hot statement through a server-side prepared statement so its plan is reused
+    Args: cursor of a pooled connection, query with %s placeholders, params in placeholder order
+    Returns: None, rows are fetched from cursor as after cursor.execute
+    '''
+    prepared = getattr(cursor.connection, 'prepared_statements', None)
+    if not PREPARED_STATEMENTS_ENABLED or prepared is None:
+        cursor.execute(query, params)
+        return
+    
+    name = 'stmt_' + hashlib.md5(query.encode('utf-8')).hexdigest()[:16]
+    if name not in prepared:
+        cursor.execute(f"PREPARE {name} AS {positional_sql(query)}")
+        prepared.add(name)
+        _prepared_queries[name] = query
+    
+    placeholders = f" ({', '.join(['%s'] * len(params))})" if params else ''
+    cursor.execute(f"EXECUTE {name}{placeholders}", params)
+
+def track_queries(func: Callable) -> Callable:
+    '''
+    Business: Collect statement count, DB time, rows and slowest statements of one invocation
+    Args: handler(event, context) to wrap
+    Returns: handler that prints one db_stats JSON line keyed by context.request_id
+    '''
+    @functools.wraps(func)
+    def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+        if not QUERY_STATS_ENABLED:
+            return func(event, context)
+        
+        stats: Dict[str, Any] = {
+            'request_id': getattr(context, 'request_id', None),
+            'function': getattr(context, 'function_name', None),
+            'statements': 0,
+            'db_time_ms': 0.0,
+            'rows': 0,
+            'slowest': []
+        }
+        _request_stats.current = stats
+        started = time.perf_counter()
+        status_code = 500
+        
+        try:
+            response = func(event, context)
+            status_code = response.get('statusCode', 200)
+            return response
+        finally:
+            _request_stats.current = None
+            print(json.dumps({
+                'type': 'db_stats',
+                'request_id': stats['request_id'],
+                'function': stats['function'],
+                'status': status_code,
+                'statements': stats['statements'],
+                'db_time_ms': round(stats['db_time_ms'], 2),
+                'total_time_ms': round((time.perf_counter() - started) * 1000, 2),
+                'rows': stats['rows'],
+                'slowest': [
+                    {'ms': round(elapsed_ms, 2), 'rows': rows, 'sql': normalize_sql(query)}
+                    for elapsed_ms, query, rows in stats['slowest']
+                ]
+            }, ensure_ascii=False))
+    
+    return wrapper
+
+TOKEN_CACHE_SIZE = 1024
+
+_config: Optional[Dict[str, Optional[str]]] = None
+_token_cache: 'OrderedDict[bytes, Tuple[Dict[str, Any], Optional[float]]]' = OrderedDict()
+_token_cache_lock = threading.Lock()
+
+def get_config() -> Dict[str, Optional[str]]:
+    '''
+    Business: Resolve environment configuration once per warm container
+    Args: None
+    Returns: dict with jwt_secret and database_url
+    '''
+    global _config
+    if _config is None:
+        _config = {
+            'jwt_secret': os.environ.get('JWT_SECRET'),
+            'database_url': os.environ.get('DATABASE_URL')
+        }
+    return _config
+
+def json_default(value: Any) -> Any:
+    '''
+    Business: Convert database values the JSON encoder does not handle by itself
+    Args: value such as Decimal, datetime or date from a row
+    Returns: JSON-compatible value
+    '''
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+def dumps_json(data: Any) -> str:
+    '''
+    Business: Serialize response data with orjson when installed, stdlib json otherwise
+    Args: data with dicts, lists and database rows, datetime values are written as ISO 8601
+    Returns: JSON text
+    '''
+    if orjson is not None:
+        return orjson.dumps(data, default=json_default).decode('utf-8')
+    return json.dumps(data, default=json_default, ensure_ascii=False)
+
+def splice_json(body: str, raw_fields: Dict[str, str]) -> str:
+    '''
+    Business: Add members whose values are JSON text built by Postgres to a serialized object
+    Args: body with a serialized JSON object, raw_fields of member name to JSON text
+    Returns: JSON object text with the extra members, raw values are not parsed
+    '''
+    members = ','.join(f'{dumps_json(name)}:{text}' for name, text in raw_fields.items())
+    return body[:-1] + (',' if body != '{}' else '') + members + '}'
+
+def json_response(status_code: int, data: Any, headers: Optional[Dict[str, str]] = None,
+                  raw_fields: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    '''
+    Business: Build HTTP response with JSON body and CORS header
+    Args: status_code, data serializable with dumps_json, optional extra headers and
+          raw_fields with JSON text added to the body as is
+    Returns: response dict in the format expected by the function runtime
+    '''
+    body = dumps_json(data)
+    if raw_fields:
+        body = splice_json(body, raw_fields)
+    
+    return {
+        'statusCode': status_code,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            **(headers or {})
+        },
+        'body': body,
+        'isBase64Encoded': False
+    }
+
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', '1024'))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+def choose_encoding(event: Dict[str, Any]) -> Optional[str]:
+    '''
+    Business: Pick the best content encoding the client accepts
+    Args: event with Accept-Encoding header
+    Returns: 'br', 'gzip' or None for an uncompressed body
+    '''
+    headers = event.get('headers') or {}
+    header = headers.get('Accept-Encoding') or headers.get('accept-encoding') or ''
+    accepted: Dict[str, float] = {}
+    
+    for item in header.split(','):
+        name, _, params = item.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+    
+    for encoding in (['br'] if brotli is not None else []) + ['gzip']:
+        if accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+            return encoding
+    return None
+
+def compress_response(func: Callable) -> Callable:
+    '''
+    Business: Compress large JSON bodies with brotli or gzip according to Accept-Encoding
+    Args: handler(event, context) returning a response dict
+    Returns: handler whose bodies above COMPRESS_MIN_BYTES are sent compressed and base64-encoded
+    '''
+    @functools.wraps(func)
+    def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+        response = func(event, context)
+        body = response.get('body')
+        
+        if response.get('isBase64Encoded') or not isinstance(body, str) or len(body) < COMPRESS_MIN_BYTES:
+            return response
+        
+        headers = {**(response.get('headers') or {}), 'Vary': 'Accept-Encoding'}
+        encoding = choose_encoding(event)
+        if encoding is None:
+            return {**response, 'headers': headers}
+        
+        raw = body.encode('utf-8')
+        if encoding == 'br':
+            compressed = brotli.compress(raw, quality=BROTLI_QUALITY)
+        else:
+            compressed = gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0)
+        
+        headers['Content-Encoding'] = encoding
+        return {
+            **response,
+            'headers': headers,
+            'body': base64.b64encode(compressed).decode('ascii'),
+            'isBase64Encoded': True
+        }
+    
+    return wrapper
+
+def verify_token(token: str, jwt_secret: str) -> Dict[str, Any]:
+    '''
+    Business: Decode JWT, reusing payloads verified earlier in this container until they expire
+    Args: token from X-Auth-Token header, jwt_secret used to sign it
+    Returns: token payload, raises jwt.InvalidTokenError or jwt.ExpiredSignatureError for bad tokens
+    '''
+    digest = hashlib.sha256(token.encode()).digest()
+    
+    with _token_cache_lock:
+        cached = _token_cache.get(digest)
+        if cached is not None:
+            payload, expires_at = cached
+            if expires_at is None or expires_at > time.time():
+                _token_cache.move_to_end(digest)
+                return payload
+            del _token_cache[digest]
+    
+    payload = jwt.decode(token, jwt_secret, algorithms=['HS256'])
+    exp = payload.get('exp')
+    expires_at = float(exp) if isinstance(exp, (int, float)) else None
+    
+    with _token_cache_lock:
+        _token_cache[digest] = (payload, expires_at)
+        if len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+    
+    return payload
+
+def require_auth(method: str, roles: Optional[List[str]] = None) -> Callable:
+    '''
+    Business: Wrap handler with CORS preflight, method check, config check and cached JWT verification
+    Args: method allowed for the endpoint, roles allowed to call it (None for any signed-in user)
+    Returns: decorator turning func(event, context, user) into handler(event, context)
+    '''
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+            http_method: str = event.get('httpMethod', method)
+            
+            if http_method == 'OPTIONS':
+                return {
+                    'statusCode': 200,
+                    'headers': {
+                        'Access-Control-Allow-Origin': '*',
+                        'Access-Control-Allow-Methods': f'{method}, OPTIONS',
+                        'Access-Control-Allow-Headers': 'Content-Type, X-Auth-Token, If-None-Match',
+                        'Access-Control-Max-Age': '86400'
+                    },
+                    'body': '',
+                    'isBase64Encoded': False
+                }
+            
+            if http_method != method:
+                return json_response(405, {'error': 'Method not allowed'})
+            
+            headers = event.get('headers') or {}
+            token = headers.get('X-Auth-Token') or headers.get('x-auth-token')
+            
+            if not token:
+                return json_response(401, {'error': 'Токен не предоставлен'})
+            
+            config = get_config()
+            if not config['jwt_secret'] or not config['database_url']:
+                return json_response(500, {'error': 'Server configuration error'})
+            
+            try:
+                user = verify_token(token, config['jwt_secret'])
+            except jwt.ExpiredSignatureError:
+                return json_response(401, {'error': 'Токен истек'})
+            except jwt.InvalidTokenError:
+                return json_response(401, {'error': 'Неверный токен'})
+            
+            if roles is not None and user.get('role') not in roles:
+                return json_response(403, {'error': 'Доступ запрещен'})
+            
+            return func(event, context, user)
+        
+        return wrapper
+    
+    return decorator
+
+EXPORT_BATCH_ROWS = int(os.environ.get('EXPORT_BATCH_ROWS', '2000'))
+EXPORT_CHUNK_BYTES = 64 * 1024
+EXPORT_MAX_BUFFERED_BYTES = int(os.environ.get('EXPORT_MAX_BUFFERED_BYTES', str(2 * 1024 * 1024)))
+CSV_DELIMITER = ';'
+CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+EXPORT_COLUMNS = ['Группа', 'Студент', 'Email', 'Домашнее задание', 'Назначено', 'Статус',
+                  'Сдано задач', 'Всего задач', 'Баллы', 'Итоговая оценка']
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+}
+
+class ResponseStream:
+    '''
+    Business: Iterator of body chunks that owns the connection its rows are read from
+    Args: chunks iterator, cursor and conn it reads, both released once exhausted, failed or closed
+    Returns: iterator of bytes usable as a streamed response body
+    '''
+    def __init__(self, chunks: Iterator[bytes], cursor: Any, conn: Any):
+        self.chunks = chunks
+        self.cursor = cursor
+        self.conn = conn
+    
+    def __iter__(self) -> 'ResponseStream':
+        return self
+    
+    def __next__(self) -> bytes:
+        try:
+            return next(self.chunks)
+        except BaseException:
+            self.close()
+            raise
+    
+    def close(self) -> None:
+        if self.conn is None:
+            return
+        conn, self.conn = self.conn, None
+        try:
+            self.chunks.close()
+            if not self.cursor.closed:
+                self.cursor.close()
+        finally:
+            release_connection(conn)
+
+def export_cell(value: Any) -> Any:
+    '''
+    Business: Format one database value for a CSV cell
+    Args: value from a gradebook row
+    Returns: empty string for NULL, minutes-precision text for timestamps, text starting with
+             a formula character prefixed with a quote so spreadsheets keep it as text, value otherwise
+    '''
+    if value is None:
+        return ''
+    if isinstance(value, datetime.datetime):
+        return value.strftime('%Y-%m-%d %H:%M')
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+def export_rows(rows: Iterator[Tuple]) -> Iterator[Tuple]:
+    '''
+    Business: Strip the ownership columns and skip the empty row of groups without students or homework
+    Args: rows of owner teacher_id, student_id and EXPORT_COLUMNS values from the export query
+    Returns: iterator of EXPORT_COLUMNS values
+    '''
+    for row in rows:
+        if row[1] is not None:
+            yield row[2:]
+
+def iter_csv(rows: Iterable[Tuple]) -> Iterator[bytes]:
+    '''
+    Business: Write rows as CSV for Excel with a UTF-8 BOM, a few rows at a time
+    Args: rows of EXPORT_COLUMNS values
+    Returns: iterator of UTF-8 chunks of about EXPORT_CHUNK_BYTES
+    '''
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=CSV_DELIMITER)
+    buffer.write('\ufeff')
+    writer.writerow(EXPORT_COLUMNS)
+    
+    for row in rows:
+        writer.writerow([export_cell(value) for value in row])
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+def iter_xlsx(rows: Iterable[Tuple]) -> Iterator[bytes]:
+    '''
+    Business: Write rows to an XLSX workbook in constant memory mode and read it back in chunks
+    Args: rows of EXPORT_COLUMNS values
+    Returns: iterator of workbook chunks, the first one is ready after the last row is written
+    '''
+    with tempfile.TemporaryFile() as output:
+        workbook = xlsxwriter.Workbook(output, {
+            'constant_memory': True,
+            'tmpdir': tempfile.gettempdir(),
+            'strings_to_formulas': False,
+        })
+        worksheet = workbook.add_worksheet('Журнал')
+        header_format = workbook.add_format({'bold': True})
+        date_format = workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm'})
+        worksheet.write_row(0, 0, EXPORT_COLUMNS, header_format)
+        
+        for row_index, row in enumerate(rows, start=1):
+            for column_index, value in enumerate(row):
+                if isinstance(value, datetime.datetime):
+                    worksheet.write_datetime(row_index, column_index, value, date_format)
+                elif value is not None:
+                    worksheet.write(row_index, column_index, value)
+        
+        workbook.close()
+        output.seek(0)
+        chunk = output.read(EXPORT_CHUNK_BYTES)
+        while chunk:
+            yield chunk
+            chunk = output.read(EXPORT_CHUNK_BYTES)
+
+def compress_chunks(chunks: Iterator[bytes], encoding: str) -> Iterator[bytes]:
+    '''
+    Business: Compress a chunked body on the fly so it is never held uncompressed
+    Args: chunks of the body, encoding 'br' or 'gzip' from choose_encoding
+    Returns: iterator of compressed chunks forming one br or gzip stream
+    '''
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        finish = compressor.finish
+        process = compressor.process
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        finish = compressor.flush
+        process = compressor.compress
+    
+    for chunk in chunks:
+        compressed = process(chunk)
+        if compressed:
+            yield compressed
+    yield finish()
+
+def parse_int_param(value: Optional[str], min_value: int, max_value: int) -> Optional[int]:
+    '''
+    Business: Parse optional integer query parameter or JSON body id within bounds
+    Args: value from query string or request body, inclusive min_value and max_value
+    Returns: parsed int or None when value is missing or invalid, booleans and fractional numbers included
+    '''
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        return None
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return None
+    return number if min_value <= number <= max_value else None
+
+@track_queries
+@compress_response
+@require_auth('GET', roles=['teacher'])
+def handler(event: Dict[str, Any], context: Any, user: Dict[str, Any]) -> Dict[str, Any]:
+    '''
+    Business: Export gradebook of one group or of all teacher groups as CSV or XLSX
+    Args: event with httpMethod, headers with X-Auth-Token, query params optional group_id
+          and format (csv or xlsx), context with request_id and supports_streaming when the
+          caller can send the body in chunks, user with verified token payload
+    Returns: HTTP response with the file, one row per student and assigned homework,
+             413 when a file that cannot be streamed exceeds EXPORT_MAX_BUFFERED_BYTES
+             (503 behind the gateway while every stream slot is taken)
+    '''
+    teacher_id = user.get('id')
+    database_url = get_config()['database_url']
+    
+    query_params = event.get('queryStringParameters') or {}
+    export_format = query_params.get('format') or 'csv'
+    
+    if export_format not in EXPORT_CONTENT_TYPES:
+        return json_response(400, {'error': 'format должен быть csv или xlsx'})
+    
+    if export_format == 'xlsx' and xlsxwriter is None:
+        return json_response(501, {'error': 'Экспорт в XLSX недоступен'})
+    
+    group_id = None
+    if query_params.get('group_id') is not None:
+        group_id = parse_int_param(query_params.get('group_id'), 1, 2147483647)
+        if group_id is None:
+            return json_response(400, {'error': 'group_id должен быть числом'})
+    
+    stream: Optional[ResponseStream] = None
+    conn = get_connection(database_url)
+    try:
+        group_filter = "g.id = %s" if group_id is not None else "g.teacher_id = %s"
+        
+        cursor = conn.cursor(name='gradebook_export')
+        cursor.itersize = EXPORT_BATCH_ROWS
+        cursor.execute(f"""
+            SELECT 
+                g.teacher_id,
+                r.student_id,
+                g.title,
+                r.full_name,
+                r.email,
+                r.homework_title,
+                r.assigned_at,
+                r.status,
+                r.submitted_tasks,
+                r.total_tasks,
+                r.score_sum,
+                r.final_score
+            FROM groups g
+            LEFT JOIN LATERAL (
+                SELECT 
+                    u.id as student_id,
+                    u.full_name,
+                    u.email,
+                    hs.id as set_id,
+                    hs.title as homework_title,
+                    ga.assigned_at,
+                    hv.status,
+                    hv.submitted_count + hv.checked_count as submitted_tasks,
+                    hv.total_tasks,
+                    hv.score_sum,
+                    hv.final_score
+                FROM enrollments e
+                JOIN users u ON u.id = e.student_id AND u.role = 'student'
+                JOIN group_assignments ga ON ga.group_id = e.group_id
+                JOIN homework_sets hs ON hs.id = ga.set_id
+                LEFT JOIN homework_variants hv ON hv.set_id = ga.set_id AND hv.student_id = u.id
+                WHERE e.group_id = g.id
+            ) r ON g.teacher_id = %s
+            WHERE {group_filter}
+            ORDER BY g.title, g.id, r.full_name, r.student_id, r.assigned_at, r.set_id
+        """, (teacher_id, group_id if group_id is not None else teacher_id))
+        
+        rows = iter(cursor)
+        first_row = next(rows, None)
+        
+        if group_id is not None and (first_row is None or first_row[0] != teacher_id):
+            cursor.close()
+            if first_row is None:
+                return json_response(404, {'error': 'Группа не найдена'})
+            return json_response(403, {'error': 'Группа не принадлежит вам'})
+        
+        if first_row is not None:
+            rows = export_rows(itertools.chain([first_row], rows))
+        
+        headers = {
+            'Content-Type': EXPORT_CONTENT_TYPES[export_format],
+            'Content-Disposition': f'attachment; filename="gradebook-{group_id or "all"}.{export_format}"',
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Expose-Headers': 'Content-Disposition'
+        }
+        
+        chunks = iter_xlsx(rows) if export_format == 'xlsx' else iter_csv(rows)
+        encoding = choose_encoding(event) if export_format == 'csv' else None
+        if encoding is not None:
+            chunks = compress_chunks(chunks, encoding)
+            headers['Content-Encoding'] = encoding
+            headers['Vary'] = 'Accept-Encoding'
+        
+        stream = ResponseStream(chunks, cursor, conn)
+    finally:
+        if stream is None:
+            release_connection(conn)
+    
+    if getattr(context, 'supports_streaming', False):
+        return {'statusCode': 200, 'headers': headers, 'body': stream, 'isBase64Encoded': False}
+    
+    chunks_read: List[bytes] = []
+    body_size = 0
+    try:
+        for chunk in stream:
+            body_size += len(chunk)
+            if body_size > EXPORT_MAX_BUFFERED_BYTES:
+                break
+            chunks_read.append(chunk)
+    finally:
+        stream.close()
+    
+    if body_size > EXPORT_MAX_BUFFERED_BYTES:
+        if hasattr(context, 'supports_streaming'):
+            return json_response(503, {'error': 'Все потоки выгрузки заняты, повторите запрос позже'}, {'Retry-After': '5'})
+        return json_response(413, {
+            'error': f'Выгрузка больше {EXPORT_MAX_BUFFERED_BYTES / (1024 * 1024):g} МБ: выберите одну группу или скачайте через шлюз'
+        })
+    
+    body = b''.join(chunks_read)
+    return {
+        'statusCode': 200,
+        'headers': headers,
+        'body': base64.b64encode(body).decode('ascii'),
+        'isBase64Encoded': True
+    }
@@ -1,225 +1,759 @@
+import base64
+import contextlib
+import datetime
+import decimal
+import functools
+import gzip
+import hashlib
 import json
 import os
+import re
+import threading
+import time
+from collections import OrderedDict
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.pool import ThreadedConnectionPool
 import jwt
-from typing import Dict, Any
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import orjson
+except ImportError:
+    orjson = None
+from typing import Dict, Any, List, Optional, Callable, Tuple, Sequence, Set, Iterator
 
-def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+DB_POOL_MAX_CONNECTIONS = int(os.environ.get('DB_POOL_MAX_CONNECTIONS', '4'))
+DB_POOL_IDLE_CHECK_SECONDS = 30
+
+_db_pool: Optional[ThreadedConnectionPool] = None
+_db_last_used: Dict[int, float] = {}
+_db_pool_lock = threading.Lock()
+
+def get_connection(database_url: str) -> Any:
     '''
-    Business: Submit answer for task in homework variant
-    Args: event with httpMethod, headers with X-Auth-Token, body with variant_item_id and answer data
-          context with request_id
-    Returns: HTTP response with submission info
+    Business: Borrow connection from pool kept warm between invocations
+    Args: database_url used to create the pool on cold start
+    Returns: open psycopg2 connection, stale ones are transparently replaced
     '''
-    method: str = event.get('httpMethod', 'POST')
+    global _db_pool
+    if _db_pool is None or _db_pool.closed:
+        with _db_pool_lock:
+            if _db_pool is None or _db_pool.closed:
+                _db_pool = ThreadedConnectionPool(1, DB_POOL_MAX_CONNECTIONS, database_url, connection_factory=InstrumentedConnection)
     
-    if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, X-Auth-Token',
-                'Access-Control-Max-Age': '86400'
-            },
-            'body': '',
-            'isBase64Encoded': False
-        }
+    for _ in range(DB_POOL_MAX_CONNECTIONS + 1):
+        conn = _db_pool.getconn()
+        last_used = _db_last_used.get(id(conn))
+        
+        if not conn.closed and (last_used is None or time.monotonic() - last_used < DB_POOL_IDLE_CHECK_SECONDS):
+            return conn
+        
+        if not conn.closed:
+            try:
+                with conn.cursor() as check_cursor:
+                    check_cursor.execute('SELECT 1')
+                conn.rollback()
+                return conn
+            except psycopg2.Error:
+                pass
+        
+        _db_last_used.pop(id(conn), None)
+        _db_pool.putconn(conn, close=True)
     
-    if method != 'POST':
-        return {
-            'statusCode': 405,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Method not allowed'}),
-            'isBase64Encoded': False
-        }
+    raise psycopg2.OperationalError('No healthy database connection available')
+
+def release_connection(conn: Any) -> None:
+    '''
+    Business: Return connection to pool, rolling back any unfinished transaction
+    Args: conn previously borrowed with get_connection
+    Returns: None
+    '''
+    if _db_pool is None or _db_pool.closed:
+        conn.close()
+        return
     
-    headers = event.get('headers', {})
-    token = headers.get('X-Auth-Token') or headers.get('x-auth-token')
+    if not conn.closed and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+        try:
+            conn.rollback()
+        except psycopg2.Error:
+            conn.close()
     
-    if not token:
-        return {
-            'statusCode': 401,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Токен не предоставлен'}),
-            'isBase64Encoded': False
-        }
+    if conn.closed:
+        _db_last_used.pop(id(conn), None)
+        _db_pool.putconn(conn, close=True)
+    else:
+        _db_last_used[id(conn)] = time.monotonic()
+        _db_pool.putconn(conn)
+
+@contextlib.contextmanager
+def db_connection(database_url: str) -> Iterator[Any]:
+    '''
+    Business: Borrow a pooled connection for a with block and give it back on every path
+    Args: database_url for the pool
+    Returns: context manager yielding the connection, rolled back and released on exit even when the block raises
+    '''
+    conn = get_connection(database_url)
+    try:
+        yield conn
+    finally:
+        release_connection(conn)
+
+QUERY_STATS_ENABLED = os.environ.get('QUERY_STATS_ENABLED', '1') != '0'
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '200'))
+QUERY_STATS_TOP = 3
+QUERY_LOG_SQL_LENGTH = 500
+
+_request_stats = threading.local()
+_instrumented_cursor_classes: Dict[type, type] = {}
+
+def normalize_sql(query: Any) -> str:
+    '''
+    Business: Replace literals in executed SQL so statements of one shape group together in logs
+    Args: query as sent to the server (str or bytes)
+    Returns: single-line SQL with ? instead of strings, numbers and value lists,
+             EXECUTE of a prepared statement is shown as the prepared query
+    '''
+    text = query.decode('utf-8', 'replace') if isinstance(query, bytes) else str(query)
+    prepared = re.match(r'EXECUTE (stmt_\w+)', text)
+    if prepared and prepared.group(1) in _prepared_queries:
+        text = _prepared_queries[prepared.group(1)]
+    text = re.sub(r"'(?:[^']|'')*'", '?', text)
+    text = re.sub(r'\b\d+(?:\.\d+)?\b', '?', text)
+    text = re.sub(r'\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+', '(?), ...', text)
+    text = re.sub(r'\?(?:\s*,\s*\?)+', '?, ...', text)
+    return ' '.join(text.split())[:QUERY_LOG_SQL_LENGTH]
+
+def record_query(cursor: Any, elapsed: float) -> None:
+    '''
+    Business: Add one executed statement to the stats of the request running in this thread
+    Args: cursor that executed it, elapsed seconds
+    Returns: None, statements slower than SLOW_QUERY_MS are logged right away
+    '''
+    stats = getattr(_request_stats, 'current', None)
+    if stats is None:
+        return
     
-    jwt_secret = os.environ.get('JWT_SECRET')
-    database_url = os.environ.get('DATABASE_URL')
+    elapsed_ms = elapsed * 1000
+    rows = max(cursor.rowcount, 0)
+    stats['statements'] += 1
+    stats['db_time_ms'] += elapsed_ms
+    stats['rows'] += rows
     
-    if not jwt_secret or not database_url:
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Server configuration error'}),
-            'isBase64Encoded': False
-        }
+    slowest = stats['slowest']
+    if len(slowest) < QUERY_STATS_TOP or elapsed_ms > slowest[-1][0]:
+        slowest.append((elapsed_ms, cursor.query, rows))
+        slowest.sort(key=lambda entry: entry[0], reverse=True)
+        del slowest[QUERY_STATS_TOP:]
     
-    try:
-        payload = jwt.decode(token, jwt_secret, algorithms=['HS256'])
-        student_id = payload.get('id')
-        role = payload.get('role')
-        
-        if role != 'student':
-            return {
-                'statusCode': 403,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({'error': 'Доступ запрещен'}),
-                'isBase64Encoded': False
-            }
-    except:
-        return {
-            'statusCode': 401,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Неверный токен'}),
-            'isBase64Encoded': False
-        }
+    if elapsed_ms >= SLOW_QUERY_MS:
+        print(json.dumps({
+            'type': 'slow_query',
+            'request_id': stats['request_id'],
+            'function': stats['function'],
+            'ms': round(elapsed_ms, 2),
+            'rows': rows,
+            'sql': normalize_sql(cursor.query)
+        }, ensure_ascii=False))
+
+class InstrumentedCursorMixin:
+    '''
+    Business: Time execute, executemany and copy_expert of any psycopg2 cursor class
+    Args: mixed in front of the cursor class requested by the handler
+    Returns: cursor that reports every statement to record_query
+    '''
+    def execute(self, query: Any, vars: Any = None) -> Any:
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            record_query(self, time.perf_counter() - started)
     
-    body_data = json.loads(event.get('body', '{}'))
-    variant_item_id: int = body_data.get('variant_item_id')
-    answer_text: str = body_data.get('answer_text', '').strip()
-    answer_file_url: str = body_data.get('answer_file_url', '').strip()
-    answer_code: str = body_data.get('answer_code', '').strip()
-    answer_image_url: str = body_data.get('answer_image_url', '').strip()
-    answer_table_json: str = body_data.get('answer_table_json', '').strip()
-    
-    if not variant_item_id:
-        return {
-            'statusCode': 400,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Укажите variant_item_id'}),
-            'isBase64Encoded': False
+    def executemany(self, query: Any, vars_list: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            record_query(self, time.perf_counter() - started)
+    
+    def copy_expert(self, sql: Any, file: Any, size: int = 8192) -> Any:
+        started = time.perf_counter()
+        try:
+            return super().copy_expert(sql, file, size)
+        finally:
+            record_query(self, time.perf_counter() - started)
+
+class InstrumentedConnection(psycopg2.extensions.connection):
+    '''
+    Business: Connection whose cursors are instrumented whatever cursor_factory the handler passes
+    Args: same as psycopg2.connect, used as connection_factory of the pool
+    Returns: psycopg2 connection with the set of statements prepared on it
+    '''
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.prepared_statements: Set[str] = set()
+    
+    def cursor(self, *args: Any, **kwargs: Any) -> Any:
+        base_class = kwargs.get('cursor_factory') or self.cursor_factory or psycopg2.extensions.cursor
+        if not issubclass(base_class, InstrumentedCursorMixin):
+            instrumented_class = _instrumented_cursor_classes.get(base_class)
+            if instrumented_class is None:
+                instrumented_class = type(f'Instrumented{base_class.__name__}', (InstrumentedCursorMixin, base_class), {})
+                _instrumented_cursor_classes[base_class] = instrumented_class
+            kwargs['cursor_factory'] = instrumented_class
+        return super().cursor(*args, **kwargs)
+
+PREPARED_STATEMENTS_ENABLED = os.environ.get('PREPARED_STATEMENTS_ENABLED', '1') != '0'
+
+_prepared_queries: Dict[str, str] = {}
+
+def positional_sql(query: str) -> str:
+    '''
+    Business: Convert psycopg2 placeholders to the $n form PREPARE expects
+    Args: query with %s placeholders and %% for a literal percent sign
+    Returns: query with $1, $2, ... in placeholder order
+    '''
+    counter = iter(range(1, query.count('%s') + 1))
+    return re.sub(r'%%|%s', lambda match: '%' if match.group(0) == '%%' else f'${next(counter)}', query)
+
+def execute_prepared(cursor: Any, query: str, params: Sequence[Any] = ()) -> None:
+    '''
+    Business: Run a hot statement through a server-side prepared statement so its plan is reused
+    Args: cursor of a pooled connection, query with %s placeholders, params in placeholder order
+    Returns: None, rows are fetched from cursor as after cursor.execute
+    '''
+    prepared = getattr(cursor.connection, 'prepared_statements', None)
+    if not PREPARED_STATEMENTS_ENABLED or prepared is None:
+        cursor.execute(query, params)
+        return
+    
+    name = 'stmt_' + hashlib.md5(query.encode('utf-8')).hexdigest()[:16]
+    if name not in prepared:
+        cursor.execute(f"PREPARE {name} AS {positional_sql(query)}")
+        prepared.add(name)
+        _prepared_queries[name] = query
+    
+    placeholders = f" ({', '.join(['%s'] * len(params))})" if params else ''
+    cursor.execute(f"EXECUTE {name}{placeholders}", params)
+
+def track_queries(func: Callable) -> Callable:
+    '''
+    Business: Collect statement count, DB time, rows and slowest statements of one invocation
+    Args: handler(event, context) to wrap
+    Returns: handler that prints one db_stats JSON line keyed by context.request_id
+    '''
+    @functools.wraps(func)
+    def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+        if not QUERY_STATS_ENABLED:
+            return func(event, context)
+        
+        stats: Dict[str, Any] = {
+            'request_id': getattr(context, 'request_id', None),
+            'function': getattr(context, 'function_name', None),
+            'statements': 0,
+            'db_time_ms': 0.0,
+            'rows': 0,
+            'slowest': []
         }
+        _request_stats.current = stats
+        started = time.perf_counter()
+        status_code = 500
+        
+        try:
+            response = func(event, context)
+            status_code = response.get('statusCode', 200)
+            return response
+        finally:
+            _request_stats.current = None
+            print(json.dumps({
+                'type': 'db_stats',
+                'request_id': stats['request_id'],
+                'function': stats['function'],
+                'status': status_code,
+                'statements': stats['statements'],
+                'db_time_ms': round(stats['db_time_ms'], 2),
+                'total_time_ms': round((time.perf_counter() - started) * 1000, 2),
+                'rows': stats['rows'],
+                'slowest': [
+                    {'ms': round(elapsed_ms, 2), 'rows': rows, 'sql': normalize_sql(query)}
+                    for elapsed_ms, query, rows in stats['slowest']
+                ]
+            }, ensure_ascii=False))
     
-    if not any([answer_text, answer_file_url, answer_code, answer_image_url, answer_table_json]):
-        return {
-            'statusCode': 400,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Укажите хотя бы один вариант ответа'}),
-            'isBase64Encoded': False
+    return wrapper
+
+TOKEN_CACHE_SIZE = 1024
+
+_config: Optional[Dict[str, Optional[str]]] = None
+_token_cache: 'OrderedDict[bytes, Tuple[Dict[str, Any], Optional[float]]]' = OrderedDict()
+_token_cache_lock = threading.Lock()
+
+def get_config() -> Dict[str, Optional[str]]:
+    '''
+    Business: Resolve environment configuration once per warm container
+    Args: None
+    Returns: dict with jwt_secret and database_url
+    '''
+    global _config
+    if _config is None:
+        _config = {
+            'jwt_secret': os.environ.get('JWT_SECRET'),
+            'database_url': os.environ.get('DATABASE_URL')
         }
+    return _config
+
+def json_default(value: Any) -> Any:
+    '''
+    Business: Convert database values the JSON encoder does not handle by itself
+    Args: value such as Decimal, datetime or date from a row
+    Returns: JSON-compatible value
+    '''
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+def dumps_json(data: Any) -> str:
+    '''
+    Business: Serialize response data with orjson when installed, stdlib json otherwise
+    Args: data with dicts, lists and database rows, datetime values are written as ISO 8601
+    Returns: JSON text
+    '''
+    if orjson is not None:
+        return orjson.dumps(data, default=json_default).decode('utf-8')
+    return json.dumps(data, default=json_default, ensure_ascii=False)
+
+def splice_json(body: str, raw_fields: Dict[str, str]) -> str:
+    '''
+    Business: Add members whose values are JSON text built by Postgres to a serialized object
+    Args: body with a serialized JSON object, raw_fields of member name to JSON text
+    Returns: JSON object text with the extra members, raw values are not parsed
+    '''
+    members = ','.join(f'{dumps_json(name)}:{text}' for name, text in raw_fields.items())
+    return body[:-1] + (',' if body != '{}' else '') + members + '}'
+
+def json_response(status_code: int, data: Any, headers: Optional[Dict[str, str]] = None,
+                  raw_fields: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    '''
+    Business: Build HTTP response with JSON body and CORS header
+    Args: status_code, data serializable with dumps_json, optional extra headers and
+          raw_fields with JSON text added to the body as is
+    Returns: response dict in the format expected by the function runtime
+    '''
+    body = dumps_json(data)
+    if raw_fields:
+        body = splice_json(body, raw_fields)
     
-    conn = psycopg2.connect(database_url)
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    return {
+        'statusCode': status_code,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            **(headers or {})
+        },
+        'body': body,
+        'isBase64Encoded': False
+    }
+
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', '1024'))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+def choose_encoding(event: Dict[str, Any]) -> Optional[str]:
+    '''
+    Business: Pick the best content encoding the client accepts
+    Args: event with Accept-Encoding header
+    Returns: 'br', 'gzip' or None for an uncompressed body
+    '''
+    headers = event.get('headers') or {}
+    header = headers.get('Accept-Encoding') or headers.get('accept-encoding') or ''
+    accepted: Dict[str, float] = {}
     
-    cursor.execute(f"""
-        SELECT vi.variant_id, hv.student_id 
-        FROM variant_items vi
-        JOIN homework_variants hv ON hv.id = vi.variant_id
-        WHERE vi.id = {variant_item_id}
-    """)
-    item = cursor.fetchone()
+    for item in header.split(','):
+        name, _, params = item.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
     
-    if not item:
-        cursor.close()
-        conn.close()
+    for encoding in (['br'] if brotli is not None else []) + ['gzip']:
+        if accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+            return encoding
+    return None
+
+def compress_response(func: Callable) -> Callable:
+    '''
+    Business: Compress large JSON bodies with brotli or gzip according to Accept-Encoding
+    Args: handler(event, context) returning a response dict
+    Returns: handler whose bodies above COMPRESS_MIN_BYTES are sent compressed and base64-encoded
+    '''
+    @functools.wraps(func)
+    def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+        response = func(event, context)
+        body = response.get('body')
+        
+        if response.get('isBase64Encoded') or not isinstance(body, str) or len(body) < COMPRESS_MIN_BYTES:
+            return response
+        
+        headers = {**(response.get('headers') or {}), 'Vary': 'Accept-Encoding'}
+        encoding = choose_encoding(event)
+        if encoding is None:
+            return {**response, 'headers': headers}
+        
+        raw = body.encode('utf-8')
+        if encoding == 'br':
+            compressed = brotli.compress(raw, quality=BROTLI_QUALITY)
+        else:
+            compressed = gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0)
+        
+        headers['Content-Encoding'] = encoding
         return {
-            'statusCode': 404,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Задание не найдено'}),
-            'isBase64Encoded': False
+            **response,
+            'headers': headers,
+            'body': base64.b64encode(compressed).decode('ascii'),
+            'isBase64Encoded': True
         }
     
-    if item['student_id'] != student_id:
-        cursor.close()
-        conn.close()
-        return {
-            'statusCode': 403,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Задание не принадлежит вам'}),
-            'isBase64Encoded': False
-        }
+    return wrapper
+
+def verify_token(token: str, jwt_secret: str) -> Dict[str, Any]:
+    '''
+    Business: Decode JWT, reusing payloads verified earlier in this container until they expire
+    Args: token from X-Auth-Token header, jwt_secret used to sign it
+    Returns: token payload, raises jwt.InvalidTokenError or jwt.ExpiredSignatureError for bad tokens
+    '''
+    digest = hashlib.sha256(token.encode()).digest()
     
-    answer_text_escaped = answer_text.replace("'", "''") if answer_text else ''
-    answer_file_url_escaped = answer_file_url.replace("'", "''") if answer_file_url else ''
-    answer_code_escaped = answer_code.replace("'", "''") if answer_code else ''
-    answer_image_url_escaped = answer_image_url.replace("'", "''") if answer_image_url else ''
-    answer_table_json_escaped = answer_table_json.replace("'", "''") if answer_table_json else ''
-    
-    cursor.execute(f"""
-        SELECT id FROM submissions 
-        WHERE variant_item_id = {variant_item_id} AND student_id = {student_id}
-    """)
-    existing = cursor.fetchone()
-    
-    if existing:
-        cursor.execute(f"""
-            UPDATE submissions SET
-                answer_text = '{answer_text_escaped}',
-                answer_file_url = '{answer_file_url_escaped}',
-                answer_code = '{answer_code_escaped}',
-                answer_image_url = '{answer_image_url_escaped}',
-                answer_table_json = '{answer_table_json_escaped}',
-                status = 'submitted',
-                updated_at = CURRENT_TIMESTAMP
-            WHERE id = {existing['id']}
-            RETURNING id, status, created_at, updated_at
-        """)
-    else:
-        cursor.execute(f"""
-            INSERT INTO submissions (
-                student_id, variant_item_id, 
-                answer_text, answer_file_url, answer_code, answer_image_url, answer_table_json,
-                status
-            )
-            VALUES (
-                {student_id}, {variant_item_id},
-                '{answer_text_escaped}', '{answer_file_url_escaped}', '{answer_code_escaped}', 
-                '{answer_image_url_escaped}', '{answer_table_json_escaped}',
-                'submitted'
-            )
-            RETURNING id, status, created_at, updated_at
-        """)
+    with _token_cache_lock:
+        cached = _token_cache.get(digest)
+        if cached is not None:
+            payload, expires_at = cached
+            if expires_at is None or expires_at > time.time():
+                _token_cache.move_to_end(digest)
+                return payload
+            del _token_cache[digest]
     
-    submission = cursor.fetchone()
+    payload = jwt.decode(token, jwt_secret, algorithms=['HS256'])
+    exp = payload.get('exp')
+    expires_at = float(exp) if isinstance(exp, (int, float)) else None
     
-    conn.commit()
-    cursor.close()
-    conn.close()
+    with _token_cache_lock:
+        _token_cache[digest] = (payload, expires_at)
+        if len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
     
-    return {
-        'statusCode': 200,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*'
-        },
-        'body': json.dumps({
-            'success': True,
-            'submission': {
+    return payload
+
+def require_auth(method: str, roles: Optional[List[str]] = None) -> Callable:
+    '''
+    Business: Wrap handler with CORS preflight, method check, config check and cached JWT verification
+    Args: method allowed for the endpoint, roles allowed to call it (None for any signed-in user)
+    Returns: decorator turning func(event, context, user) into handler(event, context)
+    '''
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+            http_method: str = event.get('httpMethod', method)
+            
+            if http_method == 'OPTIONS':
+                return {
+                    'statusCode': 200,
+                    'headers': {
+                        'Access-Control-Allow-Origin': '*',
+                        'Access-Control-Allow-Methods': f'{method}, OPTIONS',
+                        'Access-Control-Allow-Headers': 'Content-Type, X-Auth-Token, If-None-Match',
+                        'Access-Control-Max-Age': '86400'
+                    },
+                    'body': '',
+                    'isBase64Encoded': False
+                }
+            
+            if http_method != method:
+                return json_response(405, {'error': 'Method not allowed'})
+            
+            headers = event.get('headers') or {}
+            token = headers.get('X-Auth-Token') or headers.get('x-auth-token')
+            
+            if not token:
+                return json_response(401, {'error': 'Токен не предоставлен'})
+            
+            config = get_config()
+            if not config['jwt_secret'] or not config['database_url']:
+                return json_response(500, {'error': 'Server configuration error'})
+            
+            try:
+                user = verify_token(token, config['jwt_secret'])
+            except jwt.ExpiredSignatureError:
+                return json_response(401, {'error': 'Токен истек'})
+            except jwt.InvalidTokenError:
+                return json_response(401, {'error': 'Неверный токен'})
+            
+            if roles is not None and user.get('role') not in roles:
+                return json_response(403, {'error': 'Доступ запрещен'})
+            
+            return func(event, context, user)
+        
+        return wrapper
+    
+    return decorator
+
+def parse_int_param(value: Optional[str], min_value: int, max_value: int) -> Optional[int]:
+    '''
+    Business: Parse optional integer query parameter or JSON body id within bounds
+    Args: value from query string or request body, inclusive min_value and max_value
+    Returns: parsed int or None when value is missing or invalid, booleans and fractional numbers included
+    '''
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        return None
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return None
+    return number if min_value <= number <= max_value else None
+
+MAX_BATCH_ANSWERS = 100
+MAX_VARIANT_ITEM_ID = 2147483647
+ANSWER_FIELDS = ['answer_text', 'answer_file_url', 'answer_code', 'answer_image_url', 'answer_table_json']
+
+def invalid_answer_field(answer: Dict[str, Any]) -> Optional[str]:
+    '''
+    Business: Find an answer field that is given but is not a string
+    Args: answer dict from request body
+    Returns: name of the first such field, None when every field is a string, null or absent
+    '''
+    for field in ANSWER_FIELDS:
+        value = answer.get(field)
+        if value is not None and not isinstance(value, str):
+            return field
+    return None
+
+def submit_answers_batch(cursor: Any, student_id: int, answers: List[Any]) -> List[Dict[str, Any]]:
+    '''
+    Business: Save several answers of one student with one ownership check and one upsert
+    Args: cursor with RealDictCursor factory, student_id from token, answers list of dicts with variant_item_id and answer data,
+          answer fields already checked with invalid_answer_field
+    Returns: per-item results in request order
+    '''
+    results: List[Dict[str, Any]] = []
+    pending: Dict[int, Dict[str, Any]] = {}
+    
+    for answer in answers:
+        raw_item_id = answer.get('variant_item_id') if isinstance(answer, dict) else None
+        result: Dict[str, Any] = {'variant_item_id': raw_item_id, 'success': False}
+        results.append(result)
+        
+        variant_item_id = parse_int_param(raw_item_id, 1, MAX_VARIANT_ITEM_ID)
+        if variant_item_id is None:
+            result['error'] = 'Укажите variant_item_id'
+            continue
+        
+        values = [(answer.get(field) or '').strip() for field in ANSWER_FIELDS]
+        if not any(values):
+            result['error'] = 'Укажите хотя бы один вариант ответа'
+            continue
+        
+        result['variant_item_id'] = variant_item_id
+        entry = pending.setdefault(variant_item_id, {'results': [], 'values': values})
+        entry['results'].append(result)
+        entry['values'] = values
+    
+    if not pending:
+        return results
+    
+    cursor.execute("""
+        SELECT vi.id, hv.student_id
+        FROM variant_items vi
+        JOIN homework_variants hv ON hv.id = vi.variant_id
+        WHERE vi.id = ANY(%s)
+    """, (list(pending.keys()),))
+    owners = {row['id']: row['student_id'] for row in cursor.fetchall()}
+    
+    rows: List[tuple] = []
+    for variant_item_id, entry in pending.items():
+        if variant_item_id not in owners:
+            error = 'Задание не найдено'
+        elif owners[variant_item_id] != student_id:
+            error = 'Задание не принадлежит вам'
+        else:
+            rows.append((student_id, variant_item_id, *entry['values'], 'submitted'))
+            continue
+        
+        for result in entry['results']:
+            result['error'] = error
+    
+    if not rows:
+        return results
+    
+    saved = execute_values(cursor, """
+        INSERT INTO submissions (
+            student_id, variant_item_id, 
+            answer_text, answer_file_url, answer_code, answer_image_url, answer_table_json,
+            status
+        )
+        VALUES %s
+        ON CONFLICT (variant_item_id, student_id) DO UPDATE SET
+            answer_text = EXCLUDED.answer_text,
+            answer_file_url = EXCLUDED.answer_file_url,
+            answer_code = EXCLUDED.answer_code,
+            answer_image_url = EXCLUDED.answer_image_url,
+            answer_table_json = EXCLUDED.answer_table_json,
+            status = 'submitted',
+            updated_at = CURRENT_TIMESTAMP
+        RETURNING id, variant_item_id, status, created_at, updated_at
+    """, rows, page_size=MAX_BATCH_ANSWERS, fetch=True)
+    
+    for submission in saved:
+        for result in pending[submission['variant_item_id']]['results']:
+            result['success'] = True
+            result['submission'] = {
                 'id': submission['id'],
                 'status': submission['status'],
-                'created_at': submission['created_at'].isoformat() if submission['created_at'] else None,
-                'updated_at': submission['updated_at'].isoformat() if submission['updated_at'] else None
+                'created_at': submission['created_at'],
+                'updated_at': submission['updated_at']
             }
-        }),
-        'isBase64Encoded': False
-    }
+    
+    return results
+
+@track_queries
+@compress_response
+@require_auth('POST', roles=['student'])
+def handler(event: Dict[str, Any], context: Any, user: Dict[str, Any]) -> Dict[str, Any]:
+    '''
+    Business: Submit answer for task in homework variant, or a whole batch of answers at once
+    Args: event with httpMethod, headers with X-Auth-Token, body with variant_item_id and answer data
+          or with answers list of such objects
+          context with request_id, user with verified token payload
+    Returns: HTTP response with submission info, per-item results for batch
+    '''
+    student_id = user.get('id')
+    database_url = get_config()['database_url']
+    
+    body_data = json.loads(event.get('body', '{}'))
+    
+    if 'answers' in body_data:
+        answers = body_data.get('answers')
+        
+        if not isinstance(answers, list) or not answers:
+            return json_response(400, {'error': 'Укажите список ответов answers'})
+        
+        if len(answers) > MAX_BATCH_ANSWERS:
+            return json_response(400, {'error': f'Можно отправить не более {MAX_BATCH_ANSWERS} ответов за раз'})
+        
+        for index, answer in enumerate(answers):
+            field = invalid_answer_field(answer) if isinstance(answer, dict) else None
+            if field is not None:
+                return json_response(400, {'error': f'answers[{index}]: {field} должен быть строкой', 'index': index})
+        
+        with db_connection(database_url) as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            
+            results = submit_answers_batch(cursor, student_id, answers)
+            
+            conn.commit()
+            cursor.close()
+        
+        saved_count = sum(1 for result in results if result['success'])
+        
+        return json_response(200, {
+            'success': True,
+            'results': results,
+            'saved_count': saved_count,
+            'failed_count': len(results) - saved_count
+        })
+    
+    variant_item_id = parse_int_param(body_data.get('variant_item_id'), 1, MAX_VARIANT_ITEM_ID)
+    
+    if variant_item_id is None:
+        return json_response(400, {'error': 'Укажите variant_item_id'})
+    
+    field = invalid_answer_field(body_data)
+    if field is not None:
+        return json_response(400, {'error': f'{field} должен быть строкой'})
+    
+    answer_text: str = (body_data.get('answer_text') or '').strip()
+    answer_file_url: str = (body_data.get('answer_file_url') or '').strip()
+    answer_code: str = (body_data.get('answer_code') or '').strip()
+    answer_image_url: str = (body_data.get('answer_image_url') or '').strip()
+    answer_table_json: str = (body_data.get('answer_table_json') or '').strip()
+    
+    if not any([answer_text, answer_file_url, answer_code, answer_image_url, answer_table_json]):
+        return json_response(400, {'error': 'Укажите хотя бы один вариант ответа'})
+    
+    with db_connection(database_url) as conn:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        
+        execute_prepared(cursor, """
+            WITH item AS (
+                SELECT vi.id, hv.student_id
+                FROM variant_items vi
+                JOIN homework_variants hv ON hv.id = vi.variant_id
+                WHERE vi.id = %s
+            ),
+            upserted AS (
+                INSERT INTO submissions (
+                    student_id, variant_item_id, 
+                    answer_text, answer_file_url, answer_code, answer_image_url, answer_table_json,
+                    status
+                )
+                SELECT
+                    %s::int, item.id,
+                    %s::text, %s::text, %s::text, 
+                    %s::text, %s::text,
+                    'submitted'
+                FROM item
+                WHERE item.student_id = %s
+                ON CONFLICT (variant_item_id, student_id) DO UPDATE SET
+                    answer_text = EXCLUDED.answer_text,
+                    answer_file_url = EXCLUDED.answer_file_url,
+                    answer_code = EXCLUDED.answer_code,
+                    answer_image_url = EXCLUDED.answer_image_url,
+                    answer_table_json = EXCLUDED.answer_table_json,
+                    status = 'submitted',
+                    updated_at = CURRENT_TIMESTAMP
+                RETURNING id, status, created_at, updated_at
+            )
+            SELECT 
+                item.student_id as owner_id,
+                upserted.id,
+                upserted.status,
+                upserted.created_at,
+                upserted.updated_at
+            FROM item
+            LEFT JOIN upserted ON true
+        """, (
+            variant_item_id, student_id,
+            answer_text, answer_file_url, answer_code, answer_image_url, answer_table_json,
+            student_id
+        ))
+        submission = cursor.fetchone()
+        
+        if not submission:
+            cursor.close()
+            return json_response(404, {'error': 'Задание не найдено'})
+        
+        if submission['owner_id'] != student_id:
+            cursor.close()
+            return json_response(403, {'error': 'Задание не принадлежит вам'})
+        
+        conn.commit()
+        cursor.close()
+    
+    return json_response(200, {
+        'success': True,
+        'submission': {
+            'id': submission['id'],
+            'status': submission['status'],
+            'created_at': submission['created_at'],
+            'updated_at': submission['updated_at']
+        }
+    })
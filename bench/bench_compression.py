@@ -0,0 +1,189 @@
+import argparse
+import base64
+import datetime
+import gzip
+import json
+import os
+import sys
+import time
+import urllib.request
+from typing import Dict, Any, List, Optional, Tuple
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from run_benchmarks import BACKEND_DIR, DEFAULT_SCHEMA, BenchContext, DirectDriver, build_event, git_revision, make_token, percentile
+
+ENCODINGS = ['identity', 'gzip', 'br']
+
+def pick_largest(database_url: str, schema: str) -> Dict[str, Any]:
+    '''
+    Business: Find the teacher with the biggest task bank and the group with the most variants
+    Args: database_url, schema
+    Returns: dict with teacher for getTeacherTasks and group owner plus group_id for getGroupStatistics
+    '''
+    conn = psycopg2.connect(database_url)
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    cursor.execute("SET search_path TO %s, public" % psycopg2.extensions.quote_ident(schema, cursor))
+
+    cursor.execute("""
+        SELECT u.id, u.email, COUNT(*) as task_count
+        FROM tasks t JOIN users u ON u.id = t.created_by
+        GROUP BY u.id, u.email
+        ORDER BY task_count DESC
+        LIMIT 1
+    """)
+    tasks_owner = cursor.fetchone()
+
+    cursor.execute("""
+        SELECT g.id as group_id, u.id, u.email, COUNT(*) as variant_count
+        FROM groups g
+        JOIN users u ON u.id = g.teacher_id
+        JOIN enrollments e ON e.group_id = g.id
+        JOIN homework_variants hv ON hv.student_id = e.student_id
+        GROUP BY g.id, u.id, u.email
+        ORDER BY variant_count DESC
+        LIMIT 1
+    """)
+    group_owner = cursor.fetchone()
+    cursor.close()
+    conn.close()
+
+    if not tasks_owner or not group_owner:
+        raise SystemExit('Dataset is empty, run bench/seed_dataset.py first')
+    return {'tasks_owner': dict(tasks_owner), 'group_owner': dict(group_owner)}
+
+def decompress(body: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == 'gzip':
+        return gzip.decompress(body)
+    if encoding == 'br':
+        return brotli.decompress(body)
+    return body
+
+def call_direct(driver: DirectDriver, function_name: str, request: Dict[str, Any], encoding: str) -> Tuple[float, int, float, int]:
+    '''
+    Business: Call handler in-process and measure server time, wire size and client decompression time
+    Args: driver, function_name, request, encoding sent in Accept-Encoding
+    Returns: (server ms, wire bytes, decompress ms, status code)
+    '''
+    event = build_event(request)
+    event['headers']['Accept-Encoding'] = encoding
+
+    started = time.perf_counter()
+    response = driver.modules[function_name].handler(event, BenchContext(function_name))
+    server_ms = (time.perf_counter() - started) * 1000
+
+    body = response.get('body') or ''
+    wire = base64.b64decode(body) if response.get('isBase64Encoded') else body.encode('utf-8')
+    started = time.perf_counter()
+    decompress(wire, (response.get('headers') or {}).get('Content-Encoding'))
+    decompress_ms = (time.perf_counter() - started) * 1000
+    return server_ms, len(wire), decompress_ms, int(response['statusCode'])
+
+def call_http(base_url: str, function_name: str, request: Dict[str, Any], encoding: str) -> Tuple[float, int, float, int]:
+    '''
+    Business: Call function over HTTP and measure full round trip including download
+    Args: base_url of the gateway, function_name, request, encoding sent in Accept-Encoding
+    Returns: (round trip ms, wire bytes, decompress ms, status code)
+    '''
+    query = '&'.join(f"{key}={value}" for key, value in (request['query'] or {}).items())
+    http_request = urllib.request.Request(f"{base_url.rstrip('/')}/{function_name}?{query}", method='GET',
+                                          headers={'X-Auth-Token': request['token'], 'Accept-Encoding': encoding})
+    started = time.perf_counter()
+    with urllib.request.urlopen(http_request, timeout=120) as response:
+        wire = response.read()
+        status = response.status
+        content_encoding = response.headers.get('Content-Encoding')
+    round_trip_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    decompress(wire, content_encoding)
+    return round_trip_ms, len(wire), (time.perf_counter() - started) * 1000, status
+
+def main() -> None:
+    '''
+    Business: Compare transfer size and end-to-end latency of identity, gzip and brotli responses
+    Args: command line options, see --help
+    Returns: None, prints a table and writes a JSON report
+    '''
+    parser = argparse.ArgumentParser(description='Transfer size and latency of compressed responses')
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL'))
+    parser.add_argument('--schema', default=DEFAULT_SCHEMA)
+    parser.add_argument('--jwt-secret', default=os.environ.get('JWT_SECRET'))
+    parser.add_argument('--mode', choices=['direct', 'http'], default='direct')
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--requests', type=int, default=20)
+    parser.add_argument('--bandwidth-mbps', type=float, nargs='*', default=[10.0, 100.0],
+                        help='link speeds used to model download time in direct mode')
+    parser.add_argument('--output', default='bench-compression.json')
+    options = parser.parse_args()
+
+    if not options.database_url or not options.jwt_secret:
+        parser.error('DATABASE_URL and JWT_SECRET must be set')
+
+    largest = pick_largest(options.database_url, options.schema)
+    tasks_token = make_token(largest['tasks_owner'], 'teacher', options.jwt_secret)
+    group_token = make_token(largest['group_owner'], 'teacher', options.jwt_secret)
+    scenarios = {
+        'getTeacherTasks': {'method': 'GET', 'token': tasks_token, 'query': None, 'body': None},
+        'getGroupStatistics': {'method': 'GET', 'token': group_token, 'query': {'group_id': largest['group_owner']['group_id']}, 'body': None}
+    }
+
+    driver: Optional[DirectDriver] = None
+    if options.mode == 'direct':
+        os.environ['DATABASE_URL'] = options.database_url
+        os.environ['JWT_SECRET'] = options.jwt_secret
+        os.environ.setdefault('QUERY_STATS_ENABLED', '0')
+        driver = DirectDriver(BACKEND_DIR)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for function_name, request in scenarios.items():
+        results[function_name] = {}
+        for encoding in ENCODINGS:
+            if encoding == 'br' and brotli is None:
+                continue
+            samples: List[Tuple[float, int, float, int]] = []
+            for _ in range(options.requests + 1):
+                if driver is not None:
+                    samples.append(call_direct(driver, function_name, request, encoding))
+                else:
+                    samples.append(call_http(options.base_url, function_name, request, encoding))
+            samples = samples[1:]
+
+            server_ms = sorted(sample[0] for sample in samples)
+            decompress_ms = sorted(sample[2] for sample in samples)
+            wire_bytes = samples[-1][1]
+            result: Dict[str, Any] = {
+                'status': samples[-1][3],
+                'wire_bytes': wire_bytes,
+                'p50_ms': round(percentile(server_ms, 0.50), 3),
+                'p95_ms': round(percentile(server_ms, 0.95), 3),
+                'decompress_p50_ms': round(percentile(decompress_ms, 0.50), 3)
+            }
+            if driver is not None:
+                result['end_to_end_p50_ms'] = {
+                    f"{bandwidth:g}mbps": round(result['p50_ms'] + result['decompress_p50_ms'] + wire_bytes * 8 / (bandwidth * 1000), 3)
+                    for bandwidth in options.bandwidth_mbps
+                }
+            results[function_name][encoding] = result
+            print(f"{function_name:20} {encoding:9} {wire_bytes:>11} bytes  p50 {result['p50_ms']:>9}ms  p95 {result['p95_ms']:>9}ms  "
+                  f"e2e {result.get('end_to_end_p50_ms', result['p50_ms'])}", file=sys.stderr)
+
+    report = {
+        'revision': git_revision(),
+        'created_at': datetime.datetime.utcnow().replace(microsecond=0).isoformat() + 'Z',
+        'mode': options.mode,
+        'requests': options.requests,
+        'results': results
+    }
+    with open(options.output, 'w') as report_file:
+        json.dump(report, report_file, indent=2)
+    print(f"report written to {options.output}", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, Any, List
+
+import psycopg2
+
+from check_queries import invoke, prepared_statements
+from run_benchmarks import BACKEND_DIR, DEFAULT_SCHEMA, DirectDriver, build_scenarios, git_revision, load_fixtures, percentile
+
+SCENARIOS = ['getHomeworkTasks', 'getGroupStatistics']
+MODES = ['plain', 'prepared']
+
+def planning_times(database_url: str, schema: str, statements: List[bytes]) -> List[float]:
+    '''
+    Business: Measure server planning time of captured statements with EXPLAIN ANALYZE on one session
+    Args: database_url, schema, statements as sent by the handlers, EXECUTE ones are prepared first
+    Returns: planning milliseconds per statement in the given order
+    '''
+    conn = psycopg2.connect(database_url)
+    conn.autocommit = True
+    cursor = conn.cursor()
+    cursor.execute("SET search_path TO %s, public" % psycopg2.extensions.quote_ident(schema, cursor))
+
+    prepared: set = set()
+    times: List[float] = []
+    for statement in statements:
+        sql = statement.decode('utf-8')
+        if sql.startswith('EXECUTE '):
+            name = sql.split()[1]
+            if name not in prepared:
+                cursor.execute(prepared_statements[name])
+                prepared.add(name)
+        cursor.execute('EXPLAIN (ANALYZE, SUMMARY, FORMAT JSON) ' + sql)
+        times.append(cursor.fetchone()[0][0]['Planning Time'])
+
+    conn.close()
+    return times
+
+def main() -> None:
+    '''
+    Business: Compare planning time and latency of plain parameterized and prepared statements
+    Args: command line options, see --help
+    Returns: None, prints a table and writes a JSON report
+    '''
+    parser = argparse.ArgumentParser(description='Planning time saved by server-side prepared statements')
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL'))
+    parser.add_argument('--schema', default=DEFAULT_SCHEMA)
+    parser.add_argument('--jwt-secret', default=os.environ.get('JWT_SECRET'))
+    parser.add_argument('--requests', type=int, default=200, help='requests per endpoint and mode')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default='bench-prepared.json')
+    options = parser.parse_args()
+
+    if not options.database_url or not options.jwt_secret:
+        parser.error('DATABASE_URL and JWT_SECRET must be set')
+
+    os.environ['DATABASE_URL'] = options.database_url
+    os.environ['JWT_SECRET'] = options.jwt_secret
+    os.environ.setdefault('QUERY_STATS_ENABLED', '0')
+
+    scenarios = build_scenarios(load_fixtures(options.database_url, options.schema), options.jwt_secret)
+    driver = DirectDriver(BACKEND_DIR)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for scenario in SCENARIOS:
+        function_name, build_request = scenarios[scenario]
+        module = driver.modules[function_name]
+        results[scenario] = {}
+        for mode in MODES:
+            module.PREPARED_STATEMENTS_ENABLED = mode == 'prepared'
+            rng = random.Random(options.seed)
+            latencies: List[float] = []
+            statements: List[bytes] = []
+            for _ in range(options.requests):
+                request = build_request(rng)
+                started = time.perf_counter()
+                _, _, executed = invoke(driver, function_name, request)
+                latencies.append((time.perf_counter() - started) * 1000)
+                statements.extend(executed)
+            driver.release(function_name)
+
+            planning = sorted(planning_times(options.database_url, options.schema, statements))
+            latencies.sort()
+            result = {
+                'statements': len(statements),
+                'distinct_statements': len(set(statements)),
+                'planning_p50_ms': round(percentile(planning, 0.50), 3),
+                'planning_total_ms': round(sum(planning), 1),
+                'p50_ms': round(percentile(latencies, 0.50), 3),
+                'p95_ms': round(percentile(latencies, 0.95), 3)
+            }
+            results[scenario][mode] = result
+            print(f"{scenario:20} {mode:9} planning p50 {result['planning_p50_ms']:>7}ms  total {result['planning_total_ms']:>8}ms  "
+                  f"request p50 {result['p50_ms']:>8}ms  p95 {result['p95_ms']:>8}ms", file=sys.stderr)
+
+    report = {
+        'revision': git_revision(),
+        'created_at': datetime.datetime.utcnow().replace(microsecond=0).isoformat() + 'Z',
+        'requests': options.requests,
+        'results': results
+    }
+    with open(options.output, 'w') as report_file:
+        json.dump(report, report_file, indent=2)
+    print(f"report written to {options.output}", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
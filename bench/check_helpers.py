@@ -0,0 +1,136 @@
+import argparse
+import ast
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+BACKEND_DIR = os.path.join(ROOT_DIR, 'backend')
+GATEWAY_APP = os.path.join(ROOT_DIR, 'gateway', 'app.py')
+SHARED_HELPERS = os.path.join(BENCH_DIR, 'shared_helpers.py')
+
+Block = Tuple[int, int, str]
+
+def block_name(node: ast.stmt) -> Optional[str]:
+    '''
+    Business: Name a top-level statement so copies of it can be matched across files
+    Args: node from the module body
+    Returns: defined function, class or variable name, 'try import <module>' for optional
+             imports, None for plain imports and anything else that is not a helper
+    '''
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        return node.name
+    if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+        return node.targets[0].id
+    if isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+        return node.target.id
+    if isinstance(node, ast.Try) and node.body and isinstance(node.body[0], ast.Import):
+        return 'try import ' + node.body[0].names[0].name
+    return None
+
+def read_blocks(path: str) -> Tuple[List[str], Dict[str, Block]]:
+    '''
+    Business: Split a module into its named top-level blocks
+    Args: path of a Python file
+    Returns: lines of the file and blocks by name as (first line index, end line index, source)
+    '''
+    with open(path, encoding='utf-8') as source_file:
+        source = source_file.read()
+    lines = source.splitlines(keepends=True)
+    blocks: Dict[str, Block] = {}
+    for node in ast.parse(source, path).body:
+        name = block_name(node)
+        if name is None:
+            continue
+        decorators = getattr(node, 'decorator_list', None)
+        start = (decorators[0].lineno if decorators else node.lineno) - 1
+        blocks[name] = (start, node.end_lineno, ''.join(lines[start:node.end_lineno]))
+    return lines, blocks
+
+def gateway_attrs() -> List[str]:
+    '''
+    Business: Find the private module globals the gateway swaps for worker-wide shared objects
+    Args: none, reads gateway/app.py
+    Returns: names from SHARED_STATE_ATTRS and every module._name the gateway assigns
+    '''
+    with open(GATEWAY_APP, encoding='utf-8') as source_file:
+        tree = ast.parse(source_file.read(), GATEWAY_APP)
+    names: List[str] = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign) and any(isinstance(target, ast.Name) and target.id == 'SHARED_STATE_ATTRS'
+                                                for target in node.targets):
+            names.extend(ast.literal_eval(node.value))
+        if isinstance(node, ast.Attribute) and isinstance(node.ctx, ast.Store) and node.attr.startswith('_'):
+            names.append(node.attr)
+    return sorted(set(names))
+
+def used_names(source: str) -> List[str]:
+    '''
+    Business: List the global names a helper refers to
+    Args: source of one top-level block
+    Returns: sorted names read or written in the block
+    '''
+    return sorted({node.id for node in ast.walk(ast.parse(source)) if isinstance(node, ast.Name)})
+
+def check_function(path: str, canonical: Dict[str, Block], write: bool) -> List[str]:
+    '''
+    Business: Compare every helper a function carries with the canonical copy, optionally overwriting it
+    Args: path of backend/<name>/index.py, canonical blocks of shared_helpers.py, write to sync the file
+    Returns: names of helpers that differ and of canonical helpers they use but the file lacks
+    '''
+    lines, blocks = read_blocks(path)
+    drifted = [name for name, block in blocks.items() if name in canonical and block[2] != canonical[name][2]]
+    missing: Dict[str, str] = {}
+    for name in blocks:
+        if name in canonical:
+            for used in used_names(canonical[name][2]):
+                if used in canonical and used not in blocks:
+                    missing.setdefault(used, name)
+
+    if write and (drifted or missing):
+        edits = [(blocks[name][0], blocks[name][1], canonical[name][2]) for name in drifted]
+        edits += [(blocks[user][0], blocks[user][0], canonical[name][2] + '\n') for name, user in missing.items()]
+        for start, end, text in sorted(edits, key=lambda edit: (edit[0], edit[1]), reverse=True):
+            lines[start:end] = [text]
+        with open(path, 'w', encoding='utf-8') as target_file:
+            target_file.write(''.join(lines))
+        return drifted + [f'{name} (added)' for name in missing] + check_function(path, canonical, write)
+    return drifted + [f'{name} (missing, used by {user})' for name, user in missing.items()]
+
+def main() -> None:
+    '''
+    Business: Fail when a function's copy of the shared helpers differs from bench/shared_helpers.py
+    Args: command line flag --write to copy the canonical helpers into the functions instead
+    Returns: None, exits with status 1 on drift
+    '''
+    parser = argparse.ArgumentParser(description='Check that backend functions carry identical shared helpers')
+    parser.add_argument('--write', action='store_true', help='overwrite drifted helpers with the canonical copy')
+    options = parser.parse_args()
+
+    _, canonical = read_blocks(SHARED_HELPERS)
+    failures: List[str] = []
+
+    missing = [name for name in gateway_attrs() if name not in canonical]
+    if missing:
+        failures.append(f"gateway/app.py shares {', '.join(missing)}, not defined in bench/shared_helpers.py")
+
+    for name in sorted(os.listdir(BACKEND_DIR)):
+        path = os.path.join(BACKEND_DIR, name, 'index.py')
+        if not os.path.isfile(path):
+            continue
+        drifted = check_function(path, canonical, options.write)
+        if drifted:
+            action = 'synced' if options.write else 'differs'
+            print(f"{name:24} {action}: {', '.join(drifted)}", file=sys.stderr)
+            if not options.write:
+                failures.append(f"{name}: out of sync with bench/shared_helpers.py: {', '.join(drifted)}")
+
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+    print('shared helpers match', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
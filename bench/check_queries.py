@@ -0,0 +1,286 @@
+import argparse
+import json
+import os
+import sys
+import uuid
+from typing import Dict, Any, List, Optional, Tuple
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+from run_benchmarks import BACKEND_DIR, DEFAULT_PASSWORD, DEFAULT_SCHEMA, BenchContext, DirectDriver, build_event, make_token
+
+QUERY_BUDGETS = {
+    'getHomeworkTasks': 2,
+    'assignHomeworkToGroup': 1,
+    'createHomeworkSet': 3,
+    'addStudentToGroup': 1,
+    'submitAnswer': 2,
+    'getGroupStatistics': 1,
+    'getGroupStudents': 1,
+    'getStudentHomework': 2,
+    'getStudentDashboard': 1,
+    'getStudentDebts': 1,
+    'getTeacherGroups': 2,
+    'getTeacherHomework': 2,
+    'getTeacherTasks': 2,
+    'getTeacherTheory': 2,
+    'searchLibrary': 1,
+    'searchStudents': 1,
+    'exportGradebook': 1
+}
+SEQ_SCAN_FORBIDDEN = {'submissions', 'variant_items'}
+LARGE_SIZE = 20
+LARGE_GROUP_SIZE = 200
+
+Captured = Tuple[int, Dict[str, Any], List[bytes]]
+
+prepared_statements: Dict[str, bytes] = {}
+
+def invoke(driver: DirectDriver, function_name: str, request: Dict[str, Any]) -> Captured:
+    '''
+    Business: Run handler in-process and capture every statement it sent to the database
+    Args: driver with loaded modules, function_name, request as built for the benchmark
+    Returns: (status code, parsed body, executed SQL in execution order), PREPARE statements
+             are kept in prepared_statements instead so they do not count against the budget
+    '''
+    module = driver.modules[function_name]
+    statements: List[bytes] = []
+    stats = {'request_id': 'check', 'function': function_name, 'statements': 0, 'db_time_ms': 0.0, 'rows': 0, 'slowest': []}
+
+    original_record_query = module.record_query
+
+    def capture_query(cursor: Any, elapsed: float) -> None:
+        if cursor.query.startswith(b'PREPARE '):
+            prepared_statements[cursor.query.split()[1].decode()] = cursor.query
+        elif cursor.query != b'SELECT 1':
+            statements.append(cursor.query)
+        original_record_query(cursor, elapsed)
+
+    module.record_query = capture_query
+    module._request_stats.current = stats
+    try:
+        response = module.handler.__wrapped__(build_event(request), BenchContext(function_name))
+    finally:
+        module._request_stats.current = None
+        module.record_query = original_record_query
+
+    body = response.get('body') or '{}'
+    return int(response['statusCode']), json.loads(body) if body.startswith('{') else {}, statements
+
+def find_seq_scans(plan: Dict[str, Any]) -> List[str]:
+    found: List[str] = []
+    if plan.get('Node Type') == 'Seq Scan' and plan.get('Relation Name') in SEQ_SCAN_FORBIDDEN:
+        found.append(plan['Relation Name'])
+    for child in plan.get('Plans', []):
+        found.extend(find_seq_scans(child))
+    return found
+
+def explain_statements(database_url: str, schema: str, statements: List[bytes]) -> List[str]:
+    '''
+    Business: EXPLAIN captured statements and report sequential scans on the big tables
+    Args: database_url, schema, statements with literals already bound
+    Returns: list of problems, empty when all plans use indexes, EXECUTE of a prepared
+             statement is checked with both the custom and the generic plan
+    '''
+    problems: List[str] = []
+    conn = psycopg2.connect(database_url)
+    cursor = conn.cursor()
+    cursor.execute("SET search_path TO %s, public" % psycopg2.extensions.quote_ident(schema, cursor))
+
+    for statement in statements:
+        sql = statement.decode('utf-8', 'replace').strip()
+        if sql.upper().startswith('COPY'):
+            continue
+        
+        plan_modes = ['auto']
+        if sql.startswith('EXECUTE '):
+            name = sql.split()[1]
+            cursor.execute('SELECT 1 FROM pg_prepared_statements WHERE name = %s', (name,))
+            if cursor.fetchone() is None:
+                cursor.execute(prepared_statements[name])
+            plan_modes.append('force_generic_plan')
+        
+        for plan_mode in plan_modes:
+            cursor.execute(f"SET plan_cache_mode = {plan_mode}")
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql)
+            plan = cursor.fetchone()[0][0]['Plan']
+            for relation in find_seq_scans(plan):
+                problems.append(f"Seq Scan on {relation} ({plan_mode}): {' '.join(sql.split())[:300]}")
+            conn.rollback()
+        cursor.execute("SET search_path TO %s, public" % psycopg2.extensions.quote_ident(schema, cursor))
+
+    conn.close()
+    return problems
+
+def prepare_fixtures(driver: DirectDriver, database_url: str, schema: str, jwt_secret: str) -> Dict[str, Any]:
+    '''
+    Business: Create a teacher with a small and a large group, set and variant on top of the seeded data
+    Args: driver, database_url, schema, jwt_secret
+    Returns: ids and tokens used by the checks
+    '''
+    conn = psycopg2.connect(database_url)
+    conn.autocommit = True
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    cursor.execute("SET search_path TO %s, public" % psycopg2.extensions.quote_ident(schema, cursor))
+
+    cursor.execute("""
+        SELECT u.id, u.email FROM users u
+        WHERE u.role = 'student' AND EXISTS (SELECT 1 FROM homework_variants hv WHERE hv.student_id = u.id)
+        ORDER BY u.id
+        LIMIT %s
+    """, (LARGE_GROUP_SIZE + 1,))
+    students = cursor.fetchall()
+    if len(students) < LARGE_GROUP_SIZE + 1:
+        raise SystemExit('Dataset is too small, run bench/seed_dataset.py first')
+
+    email = f"check-{uuid.uuid4().hex[:12]}@load.test"
+    status, body, _ = invoke(driver, 'registerUser', {'method': 'POST', 'token': None, 'query': None, 'body': {
+        'full_name': 'Проверка запросов', 'email': email, 'password': DEFAULT_PASSWORD, 'role': 'teacher'}})
+    if status != 200:
+        raise SystemExit(f'registerUser failed: {status} {body}')
+    teacher = {'id': body['user_id'], 'email': email}
+    token = make_token(teacher, 'teacher', jwt_secret)
+
+    def post(function_name: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        status, body, _ = invoke(driver, function_name, {'method': 'POST', 'token': token, 'query': None, 'body': payload})
+        if status != 200:
+            raise SystemExit(f'{function_name} failed while preparing fixtures: {status} {body}')
+        return body
+
+    task_ids = [post('createTask', {'title': f'Проверка {index}', 'text': 'Найдите значение выражения', 'topic': 'Проверка',
+                                    'difficulty': 3, 'type': 'text', 'ege_number': index % 27 + 1})['task']['id']
+                for index in range(LARGE_SIZE)]
+    small_group = post('createGroup', {'title': 'Проверка: малая группа'})['group']['id']
+    large_group = post('createGroup', {'title': 'Проверка: большая группа'})['group']['id']
+    post('addStudentToGroup', {'group_id': small_group, 'student_emails': [students[0]['email']]})
+    post('addStudentToGroup', {'group_id': large_group, 'student_emails': [student['email'] for student in students[1:]]})
+    small_set = post('createHomeworkSet', {'title': 'Проверка: 1 задача', 'task_ids': task_ids[:1]})['homework_set']['id']
+    large_set = post('createHomeworkSet', {'title': f'Проверка: {LARGE_SIZE} задач', 'task_ids': task_ids})['homework_set']['id']
+    post('assignHomeworkToGroup', {'set_id': small_set, 'group_id': small_group})
+    post('assignHomeworkToGroup', {'set_id': large_set, 'group_id': large_group})
+
+    cursor.execute("SELECT id FROM homework_variants WHERE set_id = %s AND student_id = %s", (small_set, students[0]['id']))
+    small_variant = cursor.fetchone()['id']
+    cursor.execute("SELECT id FROM homework_variants WHERE set_id = %s AND student_id = %s", (large_set, students[1]['id']))
+    large_variant = cursor.fetchone()['id']
+    cursor.execute("SELECT id FROM variant_items WHERE variant_id = %s ORDER BY id", (large_variant,))
+    large_items = [row['id'] for row in cursor.fetchall()]
+    cursor.execute("SELECT id FROM variant_items WHERE variant_id = %s ORDER BY id", (small_variant,))
+    small_items = [row['id'] for row in cursor.fetchall()]
+    cursor.execute("ANALYZE")
+    conn.close()
+
+    return {
+        'teacher_token': token,
+        'task_ids': task_ids,
+        'students': students,
+        'small_student_token': make_token(students[0], 'student', jwt_secret),
+        'large_student_token': make_token(students[1], 'student', jwt_secret),
+        'small_group': small_group, 'large_group': large_group,
+        'small_set': small_set, 'large_set': large_set,
+        'small_variant': small_variant, 'large_variant': large_variant,
+        'small_items': small_items, 'large_items': large_items
+    }
+
+def build_cases(fixtures: Dict[str, Any]) -> List[Tuple[str, str, Dict[str, Any], Dict[str, Any]]]:
+    '''
+    Business: Pair each endpoint with a small and a large input, statement count must not depend on size
+    Args: fixtures from prepare_fixtures
+    Returns: list of (function name, label, small request, large request)
+    '''
+    teacher = fixtures['teacher_token']
+
+    def get(token: str, query: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return {'method': 'GET', 'token': token, 'query': query, 'body': None}
+
+    def post(token: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        return {'method': 'POST', 'token': token, 'query': None, 'body': body}
+
+    def answers(items: List[int]) -> Dict[str, Any]:
+        return {'answers': [{'variant_item_id': item_id, 'answer_text': '42'} for item_id in items]}
+
+    small_student, large_student = fixtures['small_student_token'], fixtures['large_student_token']
+    return [
+        ('getHomeworkTasks', 'tasks in variant',
+         get(small_student, {'variant_id': fixtures['small_variant']}), get(large_student, {'variant_id': fixtures['large_variant']})),
+        ('assignHomeworkToGroup', 'students in group',
+         post(teacher, {'set_id': fixtures['small_set'], 'group_id': fixtures['small_group']}),
+         post(teacher, {'set_id': fixtures['large_set'], 'group_id': fixtures['large_group']})),
+        ('createHomeworkSet', 'tasks in set',
+         post(teacher, {'title': 'Проверка', 'task_ids': fixtures['task_ids'][:1]}),
+         post(teacher, {'title': 'Проверка', 'task_ids': fixtures['task_ids']})),
+        ('addStudentToGroup', 'emails in bulk request',
+         post(teacher, {'group_id': fixtures['large_group'], 'student_emails': [fixtures['students'][1]['email']]}),
+         post(teacher, {'group_id': fixtures['large_group'], 'student_emails': [student['email'] for student in fixtures['students']]})),
+        ('submitAnswer', 'answers in batch',
+         post(small_student, answers(fixtures['small_items'])), post(large_student, answers(fixtures['large_items']))),
+        ('getGroupStatistics', 'students in group',
+         get(teacher, {'group_id': fixtures['small_group']}), get(teacher, {'group_id': fixtures['large_group']})),
+        ('getGroupStudents', 'students in group',
+         get(teacher, {'group_id': fixtures['small_group']}), get(teacher, {'group_id': fixtures['large_group']})),
+        ('getStudentHomework', 'student', get(small_student), get(large_student)),
+        ('getStudentDashboard', 'student', get(small_student), get(large_student)),
+        ('getStudentDebts', 'student', get(small_student), get(large_student)),
+        ('getTeacherGroups', 'teacher', get(teacher), get(teacher)),
+        ('getTeacherHomework', 'teacher', get(teacher), get(teacher)),
+        ('getTeacherTasks', 'page size', get(teacher, {'limit': 1}), get(teacher, {'limit': LARGE_SIZE})),
+        ('getTeacherTheory', 'teacher', get(teacher), get(teacher)),
+        ('searchLibrary', 'page size', get(teacher, {'q': 'значение', 'limit': 1}), get(teacher, {'q': 'значение', 'limit': LARGE_SIZE})),
+        ('searchStudents', 'limit', get(teacher, {'q': 'student', 'limit': 1}), get(teacher, {'q': 'student', 'limit': LARGE_SIZE})),
+        ('exportGradebook', 'students in group',
+         get(teacher, {'group_id': fixtures['small_group']}), get(teacher, {'group_id': fixtures['large_group']}))
+    ]
+
+def main() -> None:
+    '''
+    Business: Fail when a handler exceeds its statement budget, scales statements with input or seq scans big tables
+    Args: command line options, see --help
+    Returns: None, exits with 1 on any failed check
+    '''
+    parser = argparse.ArgumentParser(description='Statement count and plan regression checks against a seeded database')
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL'))
+    parser.add_argument('--schema', default=DEFAULT_SCHEMA)
+    parser.add_argument('--jwt-secret', default=os.environ.get('JWT_SECRET'))
+    parser.add_argument('--no-explain', action='store_true', help='only check statement counts')
+    options = parser.parse_args()
+
+    if not options.database_url or not options.jwt_secret:
+        parser.error('DATABASE_URL and JWT_SECRET must be set')
+
+    os.environ['DATABASE_URL'] = options.database_url
+    os.environ['JWT_SECRET'] = options.jwt_secret
+    driver = DirectDriver(BACKEND_DIR)
+    fixtures = prepare_fixtures(driver, options.database_url, options.schema, options.jwt_secret)
+
+    failures: List[str] = []
+    for function_name, label, small_request, large_request in build_cases(fixtures):
+        budget = QUERY_BUDGETS[function_name]
+        counts: List[int] = []
+        for request in (small_request, large_request):
+            try:
+                status, body, statements = invoke(driver, function_name, request)
+            except psycopg2.Error as error:
+                failures.append(f"{function_name}: {' '.join(str(error).split())[:200]}")
+                break
+            if status != 200:
+                failures.append(f"{function_name}: status {status} {body.get('error', '')}")
+                break
+            counts.append(len(statements))
+            if len(statements) > budget:
+                failures.append(f"{function_name}: {len(statements)} statements, budget {budget}")
+            if not options.no_explain:
+                failures.extend(f"{function_name}: {problem}" for problem in
+                                explain_statements(options.database_url, options.schema, statements))
+        if len(counts) == 2 and counts[0] != counts[1]:
+            failures.append(f"{function_name}: statements grow with {label} ({counts[0]} -> {counts[1]})")
+        print(f"{function_name:24} statements {counts} budget {budget}", file=sys.stderr)
+
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+    print('all query checks passed', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
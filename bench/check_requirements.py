@@ -0,0 +1,77 @@
+import argparse
+import os
+import re
+import sys
+from typing import Dict, List, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+BACKEND_DIR = os.path.join(ROOT_DIR, 'backend')
+GATEWAY_REQUIREMENTS = os.path.join(ROOT_DIR, 'gateway', 'requirements.txt')
+
+def read_requirements(path: str) -> List[Tuple[str, str]]:
+    '''
+    Business: Read pinned packages from a requirements file
+    Args: path of a requirements.txt
+    Returns: (normalized package name, requirement line) in file order, comments and blank lines skipped
+    '''
+    requirements: List[Tuple[str, str]] = []
+    with open(path, encoding='utf-8') as requirements_file:
+        for line in requirements_file:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                name = re.split(r'[<>=!~\[; ]', line, 1)[0]
+                requirements.append((name.lower().replace('_', '-'), line))
+    return requirements
+
+def backend_requirements(failures: List[str]) -> Dict[str, str]:
+    '''
+    Business: Collect the union of the packages every backend function installs
+    Args: failures list that receives packages pinned to different versions by two functions
+    Returns: requirement line by package name, in order of first appearance
+    '''
+    union: Dict[str, str] = {}
+    pinned_by: Dict[str, str] = {}
+    for name in sorted(os.listdir(BACKEND_DIR)):
+        path = os.path.join(BACKEND_DIR, name, 'requirements.txt')
+        if not os.path.isfile(path):
+            continue
+        for package, line in read_requirements(path):
+            if package not in union:
+                union[package] = line
+                pinned_by[package] = name
+            elif union[package] != line:
+                failures.append(f"{name} pins {line}, {pinned_by[package]} pins {union[package]}")
+    return union
+
+def main() -> None:
+    '''
+    Business: Fail when gateway/requirements.txt lacks a package a backend function installs or pins it differently
+    Args: command line flag --write to rewrite the gateway requirements from the backend ones instead
+    Returns: None, exits with status 1 on mismatch
+    '''
+    parser = argparse.ArgumentParser(description='Check that the gateway installs every package the backend functions need')
+    parser.add_argument('--write', action='store_true', help='rewrite gateway/requirements.txt from backend/*/requirements.txt')
+    options = parser.parse_args()
+
+    failures: List[str] = []
+    union = backend_requirements(failures)
+    gateway = dict(read_requirements(GATEWAY_REQUIREMENTS))
+
+    mismatched = [line for package, line in union.items() if gateway.get(package) != line]
+    if options.write and mismatched and not failures:
+        own = [line for package, line in gateway.items() if package not in union]
+        with open(GATEWAY_REQUIREMENTS, 'w', encoding='utf-8') as requirements_file:
+            requirements_file.write(''.join(f'{line}\n' for line in list(union.values()) + own))
+        print(f"gateway/requirements.txt synced: {', '.join(mismatched)}", file=sys.stderr)
+    elif mismatched:
+        failures.append(f"gateway/requirements.txt lacks or pins differently: {', '.join(mismatched)}")
+
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+    print('gateway requirements match', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
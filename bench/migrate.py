@@ -0,0 +1,97 @@
+import argparse
+import hashlib
+import os
+import re
+import sys
+from typing import Dict, List, Tuple
+
+import psycopg2
+
+from run_benchmarks import DEFAULT_SCHEMA
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'db_migrations')
+HISTORY_TABLE = 'schema_migrations'
+SKIPPED_MIGRATIONS = {
+    'V0004': 'repeats V0003 and fails on a new database, V0013 brings homework_tasks to the same state'
+}
+
+Migration = Tuple[str, str, str, str]
+
+def read_migrations(migrations_dir: str) -> List[Migration]:
+    '''
+    Business: List the versioned migration files in apply order
+    Args: migrations_dir with V<number>__<description>.sql files
+    Returns: (version, description, checksum, sql) sorted by version number
+    '''
+    migrations: List[Tuple[int, Migration]] = []
+    for file_name in os.listdir(migrations_dir):
+        match = re.fullmatch(r'(V(\d+))__(.+)\.sql', file_name)
+        if not match:
+            continue
+        with open(os.path.join(migrations_dir, file_name), 'rb') as migration_file:
+            raw = migration_file.read()
+        migrations.append((int(match.group(2)), (match.group(1), match.group(3), hashlib.md5(raw).hexdigest(),
+                                                 raw.decode('utf-8'))))
+    return [migration for _, migration in sorted(migrations)]
+
+def main() -> None:
+    '''
+    Business: Bring a database to the schema of db_migrations/, fresh or partly migrated, without manual steps
+    Args: command line options, see --help
+    Returns: None, exits with 1 when an applied migration file was changed afterwards
+    '''
+    parser = argparse.ArgumentParser(description='Apply db_migrations/ in order and record them, safe to run repeatedly')
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL'))
+    parser.add_argument('--schema', default=DEFAULT_SCHEMA)
+    options = parser.parse_args()
+
+    if not options.database_url:
+        parser.error('DATABASE_URL is not set, pass --database-url')
+
+    conn = psycopg2.connect(options.database_url)
+    schema = psycopg2.extensions.quote_ident(options.schema, conn)
+    with conn.cursor() as cursor:
+        cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {schema}")
+        cursor.execute(f"SET search_path TO {schema}, public")
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {HISTORY_TABLE} (
+                version VARCHAR(20) PRIMARY KEY,
+                description VARCHAR(255) NOT NULL,
+                checksum CHAR(32) NOT NULL,
+                skipped BOOLEAN NOT NULL DEFAULT FALSE,
+                applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cursor.execute(f"SELECT version, checksum FROM {HISTORY_TABLE}")
+        applied: Dict[str, str] = dict(cursor.fetchall())
+    conn.commit()
+
+    failures: List[str] = []
+    for version, description, checksum, sql in read_migrations(MIGRATIONS_DIR):
+        if version in applied:
+            if applied[version] != checksum:
+                failures.append(f"{version}__{description}: changed after it was applied")
+            continue
+        if failures:
+            break
+
+        skipped = version in SKIPPED_MIGRATIONS
+        with conn.cursor() as cursor:
+            cursor.execute(f"SET search_path TO {schema}, public")
+            if not skipped:
+                cursor.execute(sql)
+            cursor.execute(f"INSERT INTO {HISTORY_TABLE} (version, description, checksum, skipped) VALUES (%s, %s, %s, %s)",
+                           (version, description, checksum, skipped))
+        conn.commit()
+        note = f"skipped: {SKIPPED_MIGRATIONS[version]}" if skipped else 'applied'
+        print(f"{version:6} {description:48} {note}", file=sys.stderr)
+
+    conn.close()
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+    print(f"schema {options.schema} is up to date", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
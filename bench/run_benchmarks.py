@@ -0,0 +1,538 @@
+import argparse
+import datetime
+import importlib.util
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple, Callable
+
+import jwt
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+DEFAULT_SCHEMA = 't_p78721878_edu_platform_skeleto'
+DEFAULT_PASSWORD = 'password123'
+FIXTURE_SAMPLE = 200
+REPORT_VERSION = 1
+
+class BenchContext:
+    def __init__(self, function_name: str, supports_streaming: bool = False):
+        self.request_id = str(uuid.uuid4())
+        self.function_name = function_name
+        self.supports_streaming = supports_streaming
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def load_fixtures(database_url: str, schema: str) -> Dict[str, Any]:
+    '''
+    Business: Sample real ids from the seeded database to build requests with
+    Args: database_url, schema the migrations were applied to
+    Returns: dict with teachers, students, emails, owner and id of the group with most students
+             and dataset row counts
+    '''
+    conn = psycopg2.connect(database_url)
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    cursor.execute("SET search_path TO %s, public" % psycopg2.extensions.quote_ident(schema, cursor))
+
+    cursor.execute("""
+        SELECT u.id, u.email,
+               ARRAY(SELECT g.id FROM groups g WHERE g.teacher_id = u.id ORDER BY g.id) as group_ids,
+               ARRAY(SELECT hs.id FROM homework_sets hs WHERE hs.created_by = u.id ORDER BY hs.id) as set_ids,
+               ARRAY(SELECT t.id FROM tasks t WHERE t.created_by = u.id ORDER BY t.id LIMIT 200) as task_ids
+        FROM users u
+        WHERE u.role = 'teacher' AND EXISTS (SELECT 1 FROM groups g WHERE g.teacher_id = u.id)
+        ORDER BY random()
+        LIMIT %s
+    """, (FIXTURE_SAMPLE,))
+    teachers = [dict(row) for row in cursor.fetchall()]
+
+    cursor.execute("""
+        SELECT u.id, u.email,
+               ARRAY(SELECT hv.id FROM homework_variants hv WHERE hv.student_id = u.id ORDER BY hv.id) as variant_ids,
+               ARRAY(
+                   SELECT vi.id FROM homework_variants hv
+                   JOIN variant_items vi ON vi.variant_id = hv.id
+                   WHERE hv.student_id = u.id
+                   ORDER BY hv.created_at DESC, vi.id
+                   LIMIT 100
+               ) as item_ids
+        FROM users u
+        WHERE u.role = 'student' AND EXISTS (SELECT 1 FROM homework_variants hv WHERE hv.student_id = u.id)
+        ORDER BY random()
+        LIMIT %s
+    """, (FIXTURE_SAMPLE * 10,))
+    students = [dict(row) for row in cursor.fetchall()]
+
+    cursor.execute("""
+        SELECT u.id, u.email, e.group_id
+        FROM (
+            SELECT group_id, COUNT(*) as student_count
+            FROM enrollments
+            GROUP BY group_id
+            ORDER BY student_count DESC, group_id
+            LIMIT 1
+        ) e
+        JOIN groups g ON g.id = e.group_id
+        JOIN users u ON u.id = g.teacher_id
+    """)
+    largest_group = cursor.fetchone()
+
+    counts: Dict[str, int] = {}
+    for table in ['users', 'groups', 'enrollments', 'tasks', 'theory', 'homework_sets', 'homework_variants',
+                  'variant_items', 'submissions']:
+        cursor.execute(f"SELECT reltuples::bigint as estimate FROM pg_class WHERE oid = to_regclass('{table}')")
+        counts[table] = cursor.fetchone()['estimate']
+
+    cursor.close()
+    conn.close()
+
+    if not teachers or not students or not largest_group:
+        raise SystemExit('Dataset is empty, run bench/seed_dataset.py first')
+    return {'teachers': teachers, 'students': students, 'largest_group': dict(largest_group), 'counts': counts}
+
+def make_token(user: Dict[str, Any], role: str, jwt_secret: str) -> str:
+    payload = {
+        'id': user['id'],
+        'email': user['email'],
+        'role': role,
+        'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=6)
+    }
+    return jwt.encode(payload, jwt_secret, algorithm='HS256')
+
+Request = Dict[str, Any]
+
+def build_scenarios(fixtures: Dict[str, Any], jwt_secret: str) -> Dict[str, Tuple[str, Callable[[random.Random], Request]]]:
+    '''
+    Business: Describe one representative request per handler
+    Args: fixtures from load_fixtures, jwt_secret to sign tokens
+    Returns: dict of scenario name to (function name, request builder)
+    '''
+    teachers = fixtures['teachers']
+    students = fixtures['students']
+    teacher_tokens = {teacher['id']: make_token(teacher, 'teacher', jwt_secret) for teacher in teachers}
+    student_tokens = {student['id']: make_token(student, 'student', jwt_secret) for student in students}
+    largest_group = fixtures['largest_group']
+    largest_group_token = make_token(largest_group, 'teacher', jwt_secret)
+
+    def teacher(rng: random.Random) -> Tuple[Dict[str, Any], str]:
+        picked = rng.choice(teachers)
+        return picked, teacher_tokens[picked['id']]
+
+    def student(rng: random.Random) -> Tuple[Dict[str, Any], str]:
+        picked = rng.choice(students)
+        return picked, student_tokens[picked['id']]
+
+    def get(token: str, query: Optional[Dict[str, Any]] = None) -> Request:
+        return {'method': 'GET', 'token': token, 'query': query, 'body': None}
+
+    def post(token: Optional[str], body: Dict[str, Any], method: str = 'POST') -> Request:
+        return {'method': method, 'token': token, 'query': None, 'body': body}
+
+    def group_students(rng: random.Random) -> Request:
+        owner, token = teacher(rng)
+        return get(token, {'group_id': rng.choice(owner['group_ids'])})
+
+    def group_statistics(rng: random.Random) -> Request:
+        owner, token = teacher(rng)
+        query = {'group_id': rng.choice(owner['group_ids'])}
+        if owner['set_ids']:
+            query['set_id'] = rng.choice(owner['set_ids'])
+        return get(token, query)
+
+    def homework_tasks(rng: random.Random) -> Request:
+        owner, token = student(rng)
+        return get(token, {'variant_id': rng.choice(owner['variant_ids'])})
+
+    def teacher_tasks_page(rng: random.Random) -> Request:
+        owner, token = teacher(rng)
+        return get(token, {'limit': 50, 'fields': 'summary', 'ege_number': rng.randint(1, 27)})
+
+    def search_library(rng: random.Random) -> Request:
+        owner, token = teacher(rng)
+        return get(token, {'q': rng.choice(['рекурсия', 'системы счисления', 'таблица', 'алгоритм', 'строка']), 'limit': 20})
+
+    def search_students(rng: random.Random) -> Request:
+        owner, token = teacher(rng)
+        return get(token, {'q': f"student{rng.choice(students)['id']}"[:rng.randint(4, 10)]})
+
+    def export_gradebook(export_format: str) -> Callable[[random.Random], Request]:
+        return lambda rng: get(largest_group_token, {'group_id': largest_group['group_id'], 'format': export_format})
+
+    def add_students(rng: random.Random) -> Request:
+        owner, token = teacher(rng)
+        emails = [picked['email'] for picked in rng.sample(students, min(20, len(students)))]
+        return post(token, {'group_id': rng.choice(owner['group_ids']), 'student_emails': emails})
+
+    def assign_homework(rng: random.Random) -> Request:
+        owner, token = teacher(rng)
+        return post(token, {'set_id': rng.choice(owner['set_ids']), 'group_id': rng.choice(owner['group_ids'])})
+
+    def create_homework_set(rng: random.Random) -> Request:
+        owner, token = teacher(rng)
+        task_ids = rng.sample(owner['task_ids'], min(12, len(owner['task_ids'])))
+        return post(token, {'title': f"Бенчмарк {uuid.uuid4().hex[:8]}", 'description': 'нагрузочный тест', 'task_ids': task_ids})
+
+    def submit_answer(rng: random.Random) -> Request:
+        owner, token = student(rng)
+        return post(token, {'variant_item_id': rng.choice(owner['item_ids']), 'answer_text': str(rng.randint(1, 100000))})
+
+    def submit_answers_batch(rng: random.Random) -> Request:
+        owner, token = student(rng)
+        item_ids = rng.sample(owner['item_ids'], min(10, len(owner['item_ids'])))
+        return post(token, {'answers': [{'variant_item_id': item_id, 'answer_text': str(rng.randint(1, 100000))} for item_id in item_ids]})
+
+    def login(rng: random.Random) -> Request:
+        picked = rng.choice(students)
+        return post(None, {'email': picked['email'], 'password': DEFAULT_PASSWORD})
+
+    def register(rng: random.Random) -> Request:
+        return post(None, {'full_name': 'Нагрузочный Тест', 'email': f"bench-{uuid.uuid4().hex}@load.test", 'password': DEFAULT_PASSWORD, 'role': 'student'})
+
+    def update_profile(rng: random.Random) -> Request:
+        owner, token = student(rng)
+        return post(token, {'full_name': f"Студент {rng.randint(1, 1000)}"}, method='PUT')
+
+    return {
+        'getTeacherGroups': ('getTeacherGroups', lambda rng: get(teacher(rng)[1])),
+        'getTeacherHomework': ('getTeacherHomework', lambda rng: get(teacher(rng)[1])),
+        'getTeacherTasks': ('getTeacherTasks', lambda rng: get(teacher(rng)[1])),
+        'getTeacherTasks:page': ('getTeacherTasks', teacher_tasks_page),
+        'getTeacherTheory': ('getTeacherTheory', lambda rng: get(teacher(rng)[1], {'fields': 'summary'})),
+        'getGroupStudents': ('getGroupStudents', group_students),
+        'getGroupStatistics': ('getGroupStatistics', group_statistics),
+        'searchLibrary': ('searchLibrary', search_library),
+        'searchStudents': ('searchStudents', search_students),
+        'getStudentHomework': ('getStudentHomework', lambda rng: get(student(rng)[1])),
+        'getStudentDashboard': ('getStudentDashboard', lambda rng: get(student(rng)[1])),
+        'getStudentDebts': ('getStudentDebts', lambda rng: get(student(rng)[1])),
+        'getHomeworkTasks': ('getHomeworkTasks', homework_tasks),
+        'exportGradebook:csv': ('exportGradebook', export_gradebook('csv')),
+        'exportGradebook:xlsx': ('exportGradebook', export_gradebook('xlsx')),
+        'submitAnswer': ('submitAnswer', submit_answer),
+        'submitAnswer:batch': ('submitAnswer', submit_answers_batch),
+        'createGroup': ('createGroup', lambda rng: post(teacher(rng)[1], {'title': f"Бенчмарк {uuid.uuid4().hex[:8]}"})),
+        'createTask': ('createTask', lambda rng: post(teacher(rng)[1], {'title': 'Бенчмарк', 'text': 'Найдите значение выражения', 'topic': 'Нагрузка', 'difficulty': 3, 'type': 'text', 'ege_number': rng.randint(1, 27)})),
+        'createTheory': ('createTheory', lambda rng: post(teacher(rng)[1], {'title': 'Бенчмарк', 'content': 'Конспект для нагрузочного теста', 'ege_number': rng.randint(1, 27)})),
+        'createHomeworkSet': ('createHomeworkSet', create_homework_set),
+        'assignHomeworkToGroup': ('assignHomeworkToGroup', assign_homework),
+        'addStudentToGroup': ('addStudentToGroup', add_students),
+        'loginUser': ('loginUser', login),
+        'registerUser': ('registerUser', register),
+        'updateProfile': ('updateProfile', update_profile)
+    }
+
+def build_event(request: Request) -> Dict[str, Any]:
+    '''
+    Business: Turn a scenario request into the event dict the function runtime passes to handler
+    Args: request with method, token, query and body
+    Returns: event with httpMethod, headers, queryStringParameters and body
+    '''
+    headers = {'X-Auth-Token': request['token']} if request['token'] else {}
+    query = {key: str(value) for key, value in request['query'].items()} if request['query'] else None
+    return {
+        'httpMethod': request['method'],
+        'headers': headers,
+        'queryStringParameters': query,
+        'body': json.dumps(request['body']) if request['body'] is not None else '{}',
+        'isBase64Encoded': False
+    }
+
+def peak_rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    '''
+    Business: Read the peak resident memory of the process that runs the handlers
+    Args: pid of a server process such as a gateway worker, None for this process
+    Returns: peak RSS in MB, None when it cannot be read (pid on a system without /proc)
+    '''
+    if pid is None:
+        peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak_kb / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    try:
+        with open(f'/proc/{pid}/status') as status_file:
+            for line in status_file:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+def disable_pool(module: Any) -> None:
+    '''
+    Business: Make a handler module connect and disconnect on every borrow, like a cold invocation
+    Args: module with get_connection and release_connection helpers
+    Returns: None, the module helpers are replaced
+    '''
+    def get_connection(database_url: str) -> Any:
+        return psycopg2.connect(database_url, connection_factory=getattr(module, 'InstrumentedConnection', None))
+
+    def release_connection(conn: Any) -> None:
+        conn.close()
+
+    module.get_connection = get_connection
+    module.release_connection = release_connection
+
+class DirectDriver:
+    '''
+    Business: Call backend handlers in-process, the way the cloud runtime does
+    Args: backend_dir with function directories, pooled False to open a new connection per borrow
+    Returns: driver with call(function_name, request) -> status code
+    '''
+    mode = 'direct'
+
+    def __init__(self, backend_dir: str, pooled: bool = True):
+        self.modules: Dict[str, Any] = {}
+        for name in sorted(os.listdir(backend_dir)):
+            path = os.path.join(backend_dir, name, 'index.py')
+            if not os.path.isfile(path):
+                continue
+            spec = importlib.util.spec_from_file_location(f'bench_{name}', path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            if not pooled and hasattr(module, 'get_connection'):
+                disable_pool(module)
+            self.modules[name] = module
+
+    def call(self, function_name: str, request: Request) -> int:
+        '''
+        Business: Invoke a handler and read its whole body, a streamed body chunk by chunk as the gateway sends it
+        Args: function_name, request from a scenario
+        Returns: HTTP status code
+        '''
+        result = self.modules[function_name].handler(build_event(request), BenchContext(function_name, supports_streaming=True))
+        body = result.get('body')
+        if body is not None and not isinstance(body, (str, bytes)):
+            try:
+                for _ in body:
+                    pass
+            finally:
+                body.close()
+        return int(result['statusCode'])
+
+    def release(self, function_name: str) -> None:
+        '''
+        Business: Close the function's warm pool, each function runs in its own instance in production
+        Args: function_name whose module-level pool should be closed
+        Returns: None
+        '''
+        module = self.modules[function_name]
+        if getattr(module, '_db_pool', None) is not None and not module._db_pool.closed:
+            module._db_pool.closeall()
+
+class HttpDriver:
+    '''
+    Business: Call functions over HTTP, e.g. through gateway/app.py
+    Args: base_url such as http://127.0.0.1:8000
+    Returns: driver with call(function_name, request) -> status code
+    '''
+    mode = 'http'
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip('/')
+
+    def call(self, function_name: str, request: Request) -> int:
+        url = f"{self.base_url}/{function_name}"
+        if request['query']:
+            url += '?' + urllib.parse.urlencode(request['query'])
+        headers = {'Content-Type': 'application/json', 'Accept-Encoding': 'gzip'}
+        if request['token']:
+            headers['X-Auth-Token'] = request['token']
+        data = json.dumps(request['body']).encode() if request['body'] is not None else None
+        http_request = urllib.request.Request(url, data=data, headers=headers, method=request['method'])
+        try:
+            with urllib.request.urlopen(http_request, timeout=60) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as error:
+            error.read()
+            return error.code
+
+def run_scenario(driver: Any, function_name: str, build_request: Callable[[random.Random], Request],
+                 requests: int, concurrency: int, seed: int, server_pid: Optional[int] = None) -> Dict[str, Any]:
+    '''
+    Business: Fire requests at one endpoint with a fixed number of parallel workers
+    Args: driver, function_name, build_request, total requests, concurrency, seed for request data,
+          server_pid of the gateway worker in http mode
+    Returns: dict with throughput, latency percentiles in ms, error counts and peak RSS of the handler
+             process with its growth during the run (None in http mode without server_pid)
+    '''
+    rss_pid = server_pid if driver.mode == 'http' else None
+    rss_before = peak_rss_mb(rss_pid) if driver.mode == 'direct' or server_pid else None
+    rng = random.Random(seed)
+    prepared = [build_request(rng) for _ in range(requests)]
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    errors: List[str] = []
+    lock = threading.Lock()
+
+    def worker(request: Request) -> None:
+        started = time.perf_counter()
+        try:
+            status = str(driver.call(function_name, request))
+        except Exception as error:
+            status = 'exception'
+            with lock:
+                if len(errors) < 5:
+                    errors.append(repr(error))
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            latencies.append(elapsed)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    wall_started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, prepared))
+    wall_seconds = time.perf_counter() - wall_started
+
+    rss_after = peak_rss_mb(rss_pid) if rss_before is not None else None
+
+    latencies.sort()
+    failed = sum(count for status, count in statuses.items() if not status.startswith('2'))
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'throughput_rps': round(requests / wall_seconds, 2) if wall_seconds else 0.0,
+        'mean_ms': round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'max_ms': round(latencies[-1], 3) if latencies else 0.0,
+        'statuses': statuses,
+        'error_rate': round(failed / requests, 4) if requests else 0.0,
+        'peak_rss_mb': rss_after,
+        'rss_growth_mb': round(rss_after - rss_before, 1) if rss_after is not None else None,
+        'errors': errors
+    }
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(BACKEND_DIR),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float) -> List[str]:
+    '''
+    Business: Find endpoints whose p95 latency or throughput got worse than tolerance allows
+    Args: baseline and current reports, tolerance as fraction (0.2 = 20%)
+    Returns: list of human readable regressions
+    '''
+    regressions: List[str] = []
+    for name, result in current['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous:
+            continue
+        if previous['p95_ms'] and result['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {result['p95_ms']}ms")
+        if previous['throughput_rps'] and result['throughput_rps'] < previous['throughput_rps'] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['throughput_rps']} -> {result['throughput_rps']} rps")
+        if result['error_rate'] > previous['error_rate']:
+            regressions.append(f"{name}: error rate {previous['error_rate']} -> {result['error_rate']}")
+    return regressions
+
+def main() -> None:
+    '''
+    Business: Benchmark every handler against a seeded database and write a JSON report
+    Args: command line options, see --help
+    Returns: None, exits with 1 when --compare finds regressions
+    '''
+    parser = argparse.ArgumentParser(description='Throughput and latency benchmark for backend functions')
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL'))
+    parser.add_argument('--schema', default=DEFAULT_SCHEMA)
+    parser.add_argument('--jwt-secret', default=os.environ.get('JWT_SECRET'))
+    parser.add_argument('--mode', choices=['direct', 'http'], default='direct')
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='gateway URL for --mode http')
+    parser.add_argument('--server-pid', type=int, help='http mode: gateway worker pid to read peak RSS from (run it with -w 1)')
+    parser.add_argument('--no-pool', action='store_true', help='direct mode: open a new connection per request instead of the warm pool')
+    parser.add_argument('--requests', type=int, default=200, help='requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--only', nargs='*', help='scenario names to run, default all')
+    parser.add_argument('--skip-writes', action='store_true', help='skip endpoints that create rows')
+    parser.add_argument('--rush-requests', type=int, default=5000, help='submitAnswer calls in the deadline rush, 0 to skip')
+    parser.add_argument('--rush-concurrency', type=int, default=64)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default='bench-report.json')
+    parser.add_argument('--compare', help='baseline report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    options = parser.parse_args()
+
+    if not options.database_url or not options.jwt_secret:
+        parser.error('DATABASE_URL and JWT_SECRET must be set')
+
+    fixtures = load_fixtures(options.database_url, options.schema)
+    scenarios = build_scenarios(fixtures, options.jwt_secret)
+    write_scenarios = {'submitAnswer', 'submitAnswer:batch', 'createGroup', 'createTask', 'createTheory',
+                       'createHomeworkSet', 'assignHomeworkToGroup', 'addStudentToGroup', 'registerUser', 'updateProfile'}
+
+    if options.mode == 'direct':
+        os.environ['DATABASE_URL'] = options.database_url
+        os.environ['JWT_SECRET'] = options.jwt_secret
+        os.environ['DB_POOL_MAX_CONNECTIONS'] = str(max(options.concurrency, options.rush_concurrency))
+        os.environ.setdefault('QUERY_STATS_ENABLED', '0')
+        driver: Any = DirectDriver(BACKEND_DIR, pooled=not options.no_pool)
+    else:
+        driver = HttpDriver(options.base_url)
+
+    results: Dict[str, Any] = {}
+    for index, (name, (function_name, build_request)) in enumerate(scenarios.items()):
+        if options.only and name not in options.only:
+            continue
+        if options.skip_writes and name in write_scenarios:
+            continue
+        run_scenario(driver, function_name, build_request, min(options.concurrency * 2, options.requests),
+                     options.concurrency, options.seed + 1000 + index)
+        results[name] = run_scenario(driver, function_name, build_request, options.requests,
+                                     options.concurrency, options.seed + index, options.server_pid)
+        if options.mode == 'direct':
+            driver.release(function_name)
+        result = results[name]
+        print(f"{name:28} {result['throughput_rps']:>9} rps  p50 {result['p50_ms']:>8}ms  p95 {result['p95_ms']:>8}ms  "
+              f"p99 {result['p99_ms']:>8}ms  errors {result['error_rate']}  peak rss {result['peak_rss_mb']}MB", file=sys.stderr)
+
+    if options.rush_requests and not options.skip_writes and (not options.only or 'deadlineRush' in options.only):
+        function_name, build_request = scenarios['submitAnswer']
+        results['deadlineRush'] = run_scenario(driver, function_name, build_request, options.rush_requests,
+                                               options.rush_concurrency, options.seed - 1, options.server_pid)
+        result = results['deadlineRush']
+        print(f"{'deadlineRush':28} {result['throughput_rps']:>9} rps  p50 {result['p50_ms']:>8}ms  p95 {result['p95_ms']:>8}ms  "
+              f"p99 {result['p99_ms']:>8}ms  errors {result['error_rate']}", file=sys.stderr)
+
+    report = {
+        'version': REPORT_VERSION,
+        'revision': git_revision(),
+        'created_at': datetime.datetime.utcnow().replace(microsecond=0).isoformat() + 'Z',
+        'mode': driver.mode,
+        'python': platform.python_version(),
+        'dataset': fixtures['counts'],
+        'settings': {'requests': options.requests, 'concurrency': options.concurrency, 'pooled': not options.no_pool,
+                     'rush_requests': options.rush_requests, 'rush_concurrency': options.rush_concurrency},
+        'results': results
+    }
+    with open(options.output, 'w') as report_file:
+        json.dump(report, report_file, ensure_ascii=False, indent=2)
+    print(f"report written to {options.output}", file=sys.stderr)
+
+    if options.compare:
+        with open(options.compare) as baseline_file:
+            regressions = compare_reports(json.load(baseline_file), report, options.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,357 @@
+import argparse
+import datetime
+import hashlib
+import io
+import os
+import random
+import sys
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+import psycopg2
+
+DEFAULT_SCHEMA = 't_p78721878_edu_platform_skeleto'
+DEFAULT_PASSWORD = 'password123'
+COPY_CHUNK_VARIANTS = 2000
+HISTORY_DAYS = 240
+
+EGE_TOPICS = {
+    1: 'Графы и таблицы расстояний', 2: 'Таблицы истинности', 3: 'Реляционные базы данных',
+    4: 'Кодирование информации', 5: 'Анализ алгоритмов', 6: 'Исполнитель Черепаха',
+    7: 'Кодирование изображений и звука', 8: 'Комбинаторика', 9: 'Электронные таблицы',
+    10: 'Поиск в текстовом документе', 11: 'Вычисление объема информации', 12: 'Исполнитель Редактор',
+    13: 'IP-адреса и маски сети', 14: 'Системы счисления', 15: 'Логические выражения',
+    16: 'Рекурсивные функции', 17: 'Обработка числовых последовательностей', 18: 'Динамическое программирование',
+    19: 'Теория игр: один ход', 20: 'Теория игр: два хода', 21: 'Теория игр: стратегия',
+    22: 'Параллельные процессы', 23: 'Количество программ исполнителя', 24: 'Обработка символьных строк',
+    25: 'Делители и маски чисел', 26: 'Сортировка и жадные алгоритмы', 27: 'Анализ данных и оптимизация'
+}
+CODE_EGE_NUMBERS = {6, 16, 17, 22, 23, 24, 25, 26, 27}
+TABLE_EGE_NUMBERS = {3, 9, 18}
+
+FIRST_NAMES = ['Александр', 'Мария', 'Дмитрий', 'Анна', 'Максим', 'Елена', 'Иван', 'Ольга', 'Артем', 'Дарья',
+               'Никита', 'София', 'Михаил', 'Полина', 'Егор', 'Виктория', 'Кирилл', 'Алиса', 'Андрей', 'Ксения']
+LAST_NAMES = ['Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Петров', 'Соколов', 'Михайлов',
+              'Новиков', 'Федоров', 'Морозов', 'Волков', 'Алексеев', 'Лебедев', 'Семенов', 'Егоров']
+WORDS = ['число', 'программа', 'значение', 'алгоритм', 'строка', 'массив', 'файл', 'последовательность',
+         'условие', 'исполнитель', 'команда', 'результат', 'таблица', 'запрос', 'выражение', 'минимальное',
+         'максимальное', 'количество', 'определите', 'найдите', 'натуральное', 'двоичной', 'записи', 'символов',
+         'элементов', 'сумма', 'произведение', 'делителей', 'каждого', 'если', 'только', 'ответе', 'укажите']
+
+def copy_escape(value: Any) -> str:
+    '''
+    Business: Render one value in PostgreSQL COPY text format
+    Args: value of any column type, None becomes NULL
+    Returns: escaped field string
+    '''
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    text = str(value)
+    if isinstance(value, str):
+        text = text.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+    return text
+
+class CopyBuffer:
+    '''
+    Business: Accumulate rows for one table and stream them with COPY FROM STDIN
+    Args: table name and column list
+    Returns: buffer with add() and flush(cursor)
+    '''
+    def __init__(self, table: str, columns: List[str]):
+        self.table = table
+        self.columns = columns
+        self.buffer = io.StringIO()
+        self.pending = 0
+        self.total = 0
+
+    def add(self, *values: Any) -> None:
+        self.buffer.write('\t'.join(copy_escape(value) for value in values))
+        self.buffer.write('\n')
+        self.pending += 1
+
+    def flush(self, cursor) -> None:
+        if not self.pending:
+            return
+        self.buffer.seek(0)
+        cursor.copy_expert(f"COPY {self.table} ({', '.join(self.columns)}) FROM STDIN", self.buffer)
+        self.total += self.pending
+        self.buffer = io.StringIO()
+        self.pending = 0
+
+def random_sentence(rng: random.Random, min_words: int, max_words: int) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words))]
+    return ' '.join(words).capitalize() + '.'
+
+def random_text(rng: random.Random, mean_sentences: float) -> str:
+    sentences = max(1, int(rng.lognormvariate(0, 0.6) * mean_sentences))
+    return ' '.join(random_sentence(rng, 6, 18) for _ in range(sentences))
+
+def random_timestamp(rng: random.Random, now: datetime.datetime, max_days_ago: float, min_days_ago: float = 0) -> datetime.datetime:
+    return now - datetime.timedelta(days=rng.uniform(min_days_ago, max_days_ago))
+
+def next_ids(cursor, tables: List[str]) -> Dict[str, int]:
+    '''
+    Business: Find first free id per table so generated rows can reference each other without RETURNING
+    Args: cursor, table names with SERIAL id
+    Returns: dict of table to next id
+    '''
+    ids: Dict[str, int] = {}
+    for table in tables:
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}")
+        ids[table] = cursor.fetchone()[0]
+    return ids
+
+def pick_task_type(rng: random.Random, ege_number: int) -> str:
+    if ege_number in CODE_EGE_NUMBERS and rng.random() < 0.7:
+        return 'code'
+    if ege_number in TABLE_EGE_NUMBERS and rng.random() < 0.5:
+        return 'table'
+    return rng.choices(['text', 'file', 'paint'], weights=[90, 6, 4])[0]
+
+def answer_for(rng: random.Random, task_type: str) -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str], Optional[str]]:
+    if task_type == 'code':
+        return None, None, f"n = int(input())\nprint(sum(i for i in range(n) if i % {rng.randint(2, 9)} == 0))", None, None
+    if task_type == 'file':
+        return None, f"https://cdn.example.com/answers/{rng.getrandbits(64):016x}.txt", None, None, None
+    if task_type == 'paint':
+        return None, None, None, f"https://cdn.example.com/drawings/{rng.getrandbits(64):016x}.png", None
+    if task_type == 'table':
+        return None, None, None, None, '[["x","y"],["%d","%d"]]' % (rng.randint(0, 99), rng.randint(0, 99))
+    return str(rng.randint(1, 100000)), None, None, None, None
+
+def generate(cursor, options: argparse.Namespace) -> Dict[str, int]:
+    '''
+    Business: Generate teachers, groups, students, task bank, theory, homework and submissions via COPY
+    Args: cursor inside an open transaction, parsed command line options
+    Returns: dict of table to inserted row count
+    '''
+    rng = random.Random(options.seed)
+    now = datetime.datetime.now().replace(microsecond=0)
+    password_hash = hashlib.sha256((options.password + options.salt).encode()).hexdigest()
+
+    tables = ['users', 'groups', 'enrollments', 'tasks', 'theory', 'homework_sets', 'homework_tasks',
+              'group_assignments', 'homework_variants', 'variant_items', 'submissions']
+    ids = next_ids(cursor, tables)
+
+    users = CopyBuffer('users', ['id', 'full_name', 'email', 'password_hash', 'role', 'created_at'])
+    groups = CopyBuffer('groups', ['id', 'title', 'teacher_id', 'created_at'])
+    enrollments = CopyBuffer('enrollments', ['id', 'group_id', 'student_id'])
+    tasks = CopyBuffer('tasks', ['id', 'title', 'text', 'topic', 'difficulty', 'type', 'ege_number', 'file_url',
+                                 'image_url', 'created_by', 'created_at'])
+    theory = CopyBuffer('theory', ['id', 'title', 'content', 'ege_number', 'file_url', 'created_by', 'created_at'])
+    homework_sets = CopyBuffer('homework_sets', ['id', 'title', 'description', 'theory_id', 'created_by', 'created_at'])
+    homework_tasks = CopyBuffer('homework_tasks', ['id', 'set_id', 'task_id', 'task_order', 'created_at'])
+    assignments = CopyBuffer('group_assignments', ['id', 'group_id', 'set_id', 'assigned_by', 'assigned_at'])
+    variants = CopyBuffer('homework_variants', ['id', 'set_id', 'student_id', 'status', 'final_score', 'is_debt',
+                                                'total_tasks', 'submitted_count', 'checked_count', 'scored_count',
+                                                'score_sum', 'created_at'])
+    variant_items = CopyBuffer('variant_items', ['id', 'variant_id', 'task_id'])
+    submissions = CopyBuffer('submissions', ['id', 'student_id', 'variant_item_id', 'answer_text', 'answer_file_url',
+                                             'answer_code', 'answer_image_url', 'answer_table_json', 'score', 'status',
+                                             'created_at', 'updated_at'])
+
+    task_meta: Dict[int, Tuple[str, int]] = {}
+    teacher_sets: Dict[int, List[Tuple[int, datetime.datetime, List[int]]]] = {}
+    group_members: List[Tuple[int, int, List[Tuple[int, float]]]] = []
+
+    for _ in range(options.teachers):
+        teacher_id = ids['users']
+        ids['users'] += 1
+        users.add(teacher_id, f"{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)}", f"teacher{teacher_id}@load.test",
+                  password_hash, 'teacher', random_timestamp(rng, now, HISTORY_DAYS + 60, HISTORY_DAYS))
+
+        teacher_tasks: Dict[int, List[int]] = {ege_number: [] for ege_number in EGE_TOPICS}
+        for index in range(options.tasks_per_teacher):
+            ege_number = index % len(EGE_TOPICS) + 1
+            task_type = pick_task_type(rng, ege_number)
+            difficulty = min(10, max(1, round(ege_number * 9 / 27 + rng.gauss(1, 1.2))))
+            task_id = ids['tasks']
+            ids['tasks'] += 1
+            tasks.add(task_id, f"Задание {ege_number}. {EGE_TOPICS[ege_number]} №{index + 1}", random_text(rng, 4),
+                      EGE_TOPICS[ege_number], difficulty, task_type, ege_number,
+                      f"https://cdn.example.com/tasks/{task_id}.txt" if task_type == 'file' else None,
+                      f"https://cdn.example.com/tasks/{task_id}.png" if rng.random() < 0.15 else None,
+                      teacher_id, random_timestamp(rng, now, HISTORY_DAYS))
+            task_meta[task_id] = (task_type, difficulty)
+            teacher_tasks[ege_number].append(task_id)
+
+        teacher_theory: List[int] = []
+        for index in range(options.theory_per_teacher):
+            ege_number = index % len(EGE_TOPICS) + 1
+            theory_id = ids['theory']
+            ids['theory'] += 1
+            theory.add(theory_id, f"{EGE_TOPICS[ege_number]}: разбор №{index // len(EGE_TOPICS) + 1}",
+                       random_text(rng, 40), ege_number, None, teacher_id, random_timestamp(rng, now, HISTORY_DAYS))
+            teacher_theory.append(theory_id)
+
+        teacher_sets[teacher_id] = []
+        all_teacher_tasks = [task_id for ege_tasks in teacher_tasks.values() for task_id in ege_tasks]
+        for index in range(options.sets_per_teacher):
+            set_id = ids['homework_sets']
+            ids['homework_sets'] += 1
+            created_at = now - datetime.timedelta(days=HISTORY_DAYS * (options.sets_per_teacher - index) / options.sets_per_teacher)
+            homework_sets.add(set_id, f"Домашнее задание №{index + 1}", random_sentence(rng, 5, 12),
+                              rng.choice(teacher_theory) if teacher_theory and rng.random() < 0.6 else None,
+                              teacher_id, created_at)
+            set_tasks = rng.sample(all_teacher_tasks, min(options.tasks_per_set, len(all_teacher_tasks)))
+            for task_order, task_id in enumerate(set_tasks):
+                homework_tasks.add(ids['homework_tasks'], set_id, task_id, task_order, created_at)
+                ids['homework_tasks'] += 1
+            teacher_sets[teacher_id].append((set_id, created_at, set_tasks))
+
+        for group_index in range(options.groups_per_teacher):
+            group_id = ids['groups']
+            ids['groups'] += 1
+            groups.add(group_id, f"ЕГЭ информатика, поток {group_index + 1}", teacher_id,
+                       random_timestamp(rng, now, HISTORY_DAYS + 30, HISTORY_DAYS))
+            members: List[Tuple[int, float]] = []
+            for _ in range(options.students_per_group):
+                student_id = ids['users']
+                ids['users'] += 1
+                users.add(student_id, f"{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)}", f"student{student_id}@load.test",
+                          password_hash, 'student', random_timestamp(rng, now, HISTORY_DAYS + 30, HISTORY_DAYS))
+                enrollments.add(ids['enrollments'], group_id, student_id)
+                ids['enrollments'] += 1
+                members.append((student_id, rng.betavariate(5, 2)))
+            group_members.append((teacher_id, group_id, members))
+
+    for buffer in (users, groups, enrollments, tasks, theory, homework_sets, homework_tasks):
+        buffer.flush(cursor)
+
+    variants_in_chunk = 0
+    for teacher_id, group_id, members in group_members:
+        sets = teacher_sets[teacher_id]
+        assigned_sets = rng.sample(sets, min(options.sets_per_group, len(sets)))
+        for set_id, set_created_at, set_tasks in assigned_sets:
+            assignments.add(ids['group_assignments'], group_id, set_id, teacher_id, set_created_at)
+            ids['group_assignments'] += 1
+            age_days = (now - set_created_at).days
+            for student_id, diligence in members:
+                variant_id = ids['homework_variants']
+                ids['homework_variants'] += 1
+                counters = {'submitted': 0, 'checked': 0, 'scored': 0, 'score_sum': 0}
+                answered = 0
+                completes = rng.random() < diligence * options.submission_rate
+
+                for task_id in set_tasks:
+                    item_id = ids['variant_items']
+                    ids['variant_items'] += 1
+                    variant_items.add(item_id, variant_id, task_id)
+
+                    if not completes and rng.random() > 0.4 * diligence:
+                        continue
+                    task_type, difficulty = task_meta[task_id]
+                    answered += 1
+                    if not completes and rng.random() < 0.3:
+                        status, score = 'draft', None
+                    elif age_days > 7 and rng.random() < 0.9:
+                        status = 'checked'
+                        score = min(100, max(0, round(rng.gauss(100 * diligence - difficulty * 3, 15))))
+                    else:
+                        status, score = 'submitted', None
+
+                    if status == 'submitted':
+                        counters['submitted'] += 1
+                    elif status == 'checked':
+                        counters['checked'] += 1
+                    if score is not None:
+                        counters['scored'] += 1
+                        counters['score_sum'] += score
+
+                    created_at = set_created_at + datetime.timedelta(hours=rng.uniform(1, 24 * 7))
+                    submissions.add(ids['submissions'], student_id, item_id, *answer_for(rng, task_type), score, status,
+                                    created_at, created_at + datetime.timedelta(minutes=rng.uniform(0, 600)))
+                    ids['submissions'] += 1
+
+                total_tasks = len(set_tasks)
+                if counters['checked'] == total_tasks:
+                    status = 'checked'
+                elif counters['submitted'] + counters['checked'] == total_tasks:
+                    status = 'submitted'
+                elif answered:
+                    status = 'in_progress'
+                else:
+                    status = 'not_started'
+                final_score = round(counters['score_sum'] / counters['scored']) if status == 'checked' and counters['scored'] else None
+                is_debt = age_days > 14 and status in ('not_started', 'in_progress')
+
+                variants.add(variant_id, set_id, student_id, status, final_score, is_debt, total_tasks,
+                             counters['submitted'], counters['checked'], counters['scored'], counters['score_sum'],
+                             set_created_at)
+
+                variants_in_chunk += 1
+                if variants_in_chunk >= COPY_CHUNK_VARIANTS:
+                    for buffer in (variants, variant_items, submissions):
+                        buffer.flush(cursor)
+                    variants_in_chunk = 0
+                    print(f"  {variants.total} variants, {submissions.total} submissions", file=sys.stderr)
+
+    for buffer in (assignments, variants, variant_items, submissions):
+        buffer.flush(cursor)
+
+    for table in tables:
+        cursor.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), GREATEST(%s, 1), %s)",
+                       (ids[table] - 1, ids[table] > 1))
+
+    return {buffer.table: buffer.total for buffer in (users, groups, enrollments, tasks, theory, homework_sets,
+                                                      homework_tasks, assignments, variants, variant_items, submissions)}
+
+def main() -> None:
+    '''
+    Business: Populate local Postgres with a production-sized synthetic EGE dataset
+    Args: command line options, see --help
+    Returns: None, prints row counts and load time
+    '''
+    parser = argparse.ArgumentParser(description='Load synthetic data into the schema from db_migrations/ using COPY')
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL'))
+    parser.add_argument('--schema', default=DEFAULT_SCHEMA)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--teachers', type=int, default=20)
+    parser.add_argument('--groups-per-teacher', type=int, default=5)
+    parser.add_argument('--students-per-group', type=int, default=25)
+    parser.add_argument('--tasks-per-teacher', type=int, default=300)
+    parser.add_argument('--theory-per-teacher', type=int, default=54)
+    parser.add_argument('--sets-per-teacher', type=int, default=40)
+    parser.add_argument('--sets-per-group', type=int, default=30)
+    parser.add_argument('--tasks-per-set', type=int, default=12)
+    parser.add_argument('--submission-rate', type=float, default=1.0,
+                        help='multiplier for how often students finish a whole variant, 1.0 gives ~70%% finished')
+    parser.add_argument('--password', default=DEFAULT_PASSWORD)
+    parser.add_argument('--salt', default=os.environ.get('SYSTEM_SALT', ''))
+    parser.add_argument('--analyze', action='store_true', help='run ANALYZE after loading')
+    options = parser.parse_args()
+
+    if not options.database_url:
+        parser.error('DATABASE_URL is not set, pass --database-url')
+
+    started = time.monotonic()
+    conn = psycopg2.connect(options.database_url)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SET search_path TO %s, public" % psycopg2.extensions.quote_ident(options.schema, cursor))
+            cursor.execute("ALTER TABLE submissions DISABLE TRIGGER trg_submissions_progress")
+            counts = generate(cursor, options)
+            cursor.execute("ALTER TABLE submissions ENABLE TRIGGER trg_submissions_progress")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    if options.analyze:
+        conn = psycopg2.connect(options.database_url)
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute("SET search_path TO %s, public" % psycopg2.extensions.quote_ident(options.schema, cursor))
+            cursor.execute("ANALYZE")
+        conn.close()
+
+    for table, count in counts.items():
+        print(f"{table:20} {count:>12}")
+    print(f"loaded in {time.monotonic() - started:.1f}s")
+
+if __name__ == '__main__':
+    main()
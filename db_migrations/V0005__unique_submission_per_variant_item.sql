@@ -0,0 +1,20 @@
+-- Удаление дублирующихся ответов: остается самый свежий ответ студента на задание варианта
+DELETE FROM submissions
+WHERE id IN (
+    SELECT id FROM (
+        SELECT 
+            id,
+            ROW_NUMBER() OVER (
+                PARTITION BY variant_item_id, student_id
+                ORDER BY updated_at DESC NULLS LAST, id DESC
+            ) AS rn
+        FROM submissions
+    ) ranked
+    WHERE ranked.rn > 1
+);
+
+-- Один ответ на задание варианта для upsert в submitAnswer
+ALTER TABLE submissions ADD CONSTRAINT submissions_variant_item_student_key UNIQUE (variant_item_id, student_id);
+
+-- Уникальный индекс начинается с variant_item_id и заменяет прежний индекс
+DROP INDEX IF EXISTS idx_submissions_variant_item;
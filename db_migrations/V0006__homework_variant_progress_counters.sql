@@ -0,0 +1,75 @@
+-- Счетчики прогресса варианта, чтобы дашборды не группировали submissions на каждый запрос
+ALTER TABLE homework_variants ADD COLUMN total_tasks INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE homework_variants ADD COLUMN submitted_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE homework_variants ADD COLUMN checked_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE homework_variants ADD COLUMN scored_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE homework_variants ADD COLUMN score_sum INTEGER NOT NULL DEFAULT 0;
+
+-- Инкрементальное обновление счетчиков при сохранении ответа и при проверке
+CREATE OR REPLACE FUNCTION apply_submission_progress() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE homework_variants hv SET
+            submitted_count = hv.submitted_count - (OLD.status = 'submitted')::INTEGER,
+            checked_count = hv.checked_count - (OLD.status = 'checked')::INTEGER,
+            scored_count = hv.scored_count - (OLD.score IS NOT NULL)::INTEGER,
+            score_sum = hv.score_sum - COALESCE(OLD.score, 0)
+        FROM variant_items vi
+        WHERE vi.id = OLD.variant_item_id AND hv.id = vi.variant_id AND hv.student_id = OLD.student_id;
+    END IF;
+    
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE homework_variants hv SET
+            submitted_count = hv.submitted_count + (NEW.status = 'submitted')::INTEGER,
+            checked_count = hv.checked_count + (NEW.status = 'checked')::INTEGER,
+            scored_count = hv.scored_count + (NEW.score IS NOT NULL)::INTEGER,
+            score_sum = hv.score_sum + COALESCE(NEW.score, 0)
+        FROM variant_items vi
+        WHERE vi.id = NEW.variant_item_id AND hv.id = vi.variant_id AND hv.student_id = NEW.student_id;
+    END IF;
+    
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_submissions_progress
+AFTER INSERT OR DELETE OR UPDATE OF status, score, variant_item_id, student_id ON submissions
+FOR EACH ROW EXECUTE FUNCTION apply_submission_progress();
+
+-- Полный пересчет счетчиков: SELECT refresh_homework_variant_progress(); или по списку вариантов
+CREATE OR REPLACE FUNCTION refresh_homework_variant_progress(variant_ids INTEGER[] DEFAULT NULL) RETURNS INTEGER AS $$
+DECLARE
+    updated_rows INTEGER;
+BEGIN
+    UPDATE homework_variants hv SET
+        total_tasks = progress.total_tasks,
+        submitted_count = progress.submitted_count,
+        checked_count = progress.checked_count,
+        scored_count = progress.scored_count,
+        score_sum = progress.score_sum
+    FROM (
+        SELECT 
+            v.id,
+            COUNT(vi.id) AS total_tasks,
+            COUNT(s.id) FILTER (WHERE s.status = 'submitted') AS submitted_count,
+            COUNT(s.id) FILTER (WHERE s.status = 'checked') AS checked_count,
+            COUNT(s.score) AS scored_count,
+            COALESCE(SUM(s.score), 0) AS score_sum
+        FROM homework_variants v
+        LEFT JOIN variant_items vi ON vi.variant_id = v.id
+        LEFT JOIN submissions s ON s.variant_item_id = vi.id AND s.student_id = v.student_id
+        WHERE variant_ids IS NULL OR v.id = ANY(variant_ids)
+        GROUP BY v.id
+    ) progress
+    WHERE hv.id = progress.id
+      AND (hv.total_tasks, hv.submitted_count, hv.checked_count, hv.scored_count, hv.score_sum)
+          IS DISTINCT FROM
+          (progress.total_tasks, progress.submitted_count, progress.checked_count, progress.scored_count, progress.score_sum);
+    
+    GET DIAGNOSTICS updated_rows = ROW_COUNT;
+    RETURN updated_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Заполнение счетчиков для существующих вариантов
+SELECT refresh_homework_variant_progress();
@@ -0,0 +1,5 @@
+-- Индекс для постраничной выдачи банка задач учителя по (created_at, id)
+CREATE INDEX idx_tasks_created_by_created_at_id ON tasks(created_by, created_at DESC, id DESC);
+
+-- Составной индекс начинается с created_by и заменяет прежний индекс
+DROP INDEX IF EXISTS idx_tasks_created_by;
@@ -0,0 +1,15 @@
+-- Полнотекстовый поиск по банку задач: название, тема и условие
+ALTER TABLE tasks ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('russian', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('russian', coalesce(topic, '')), 'B') ||
+    setweight(to_tsvector('russian', coalesce(text, '')), 'C')
+) STORED;
+
+-- Полнотекстовый поиск по теории: название и содержание
+ALTER TABLE theory ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('russian', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('russian', coalesce(content, '')), 'C')
+) STORED;
+
+CREATE INDEX idx_tasks_search_vector ON tasks USING GIN (search_vector);
+CREATE INDEX idx_theory_search_vector ON theory USING GIN (search_vector);
@@ -0,0 +1,5 @@
+-- Нечеткий поиск студентов по имени и email для добавления в группу
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX idx_users_student_full_name_trgm ON users USING GIN (lower(full_name) gin_trgm_ops) WHERE role = 'student';
+CREATE INDEX idx_users_student_email_trgm ON users USING GIN (lower(email) gin_trgm_ops) WHERE role = 'student';
@@ -0,0 +1,75 @@
+-- Время последнего изменения строк, из которого read-эндпоинты строят ETag
+ALTER TABLE groups ADD COLUMN updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE tasks ADD COLUMN updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE theory ADD COLUMN updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE homework_sets ADD COLUMN updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE homework_variants ADD COLUMN updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP;
+
+-- clock_timestamp, а не now: значение должно расти и внутри долгих транзакций
+CREATE OR REPLACE FUNCTION touch_updated_at() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at := clock_timestamp();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_groups_touch BEFORE UPDATE ON groups
+FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+CREATE TRIGGER trg_tasks_touch BEFORE UPDATE ON tasks
+FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+CREATE TRIGGER trg_theory_touch BEFORE UPDATE ON theory
+FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+CREATE TRIGGER trg_homework_sets_touch BEFORE UPDATE ON homework_sets
+FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+CREATE TRIGGER trg_homework_variants_touch BEFORE UPDATE ON homework_variants
+FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+
+-- Состав группы входит в ответ getTeacherGroups (student_count): изменения enrollments обновляют группу
+CREATE OR REPLACE FUNCTION touch_groups_from_enrollments() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE groups SET updated_at = clock_timestamp() WHERE id IN (SELECT DISTINCT group_id FROM new_rows);
+    END IF;
+    
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE groups SET updated_at = clock_timestamp() WHERE id IN (SELECT DISTINCT group_id FROM old_rows);
+    END IF;
+    
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_enrollments_touch_groups_insert AFTER INSERT ON enrollments
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION touch_groups_from_enrollments();
+CREATE TRIGGER trg_enrollments_touch_groups_update AFTER UPDATE ON enrollments
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION touch_groups_from_enrollments();
+CREATE TRIGGER trg_enrollments_touch_groups_delete AFTER DELETE ON enrollments
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION touch_groups_from_enrollments();
+
+-- Количество задач в ДЗ входит в ответ getTeacherHomework (task_count)
+CREATE OR REPLACE FUNCTION touch_homework_sets_from_tasks() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE homework_sets SET updated_at = clock_timestamp() WHERE id IN (SELECT DISTINCT set_id FROM new_rows);
+    END IF;
+    
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE homework_sets SET updated_at = clock_timestamp() WHERE id IN (SELECT DISTINCT set_id FROM old_rows);
+    END IF;
+    
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_homework_tasks_touch_sets_insert AFTER INSERT ON homework_tasks
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION touch_homework_sets_from_tasks();
+CREATE TRIGGER trg_homework_tasks_touch_sets_update AFTER UPDATE ON homework_tasks
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION touch_homework_sets_from_tasks();
+CREATE TRIGGER trg_homework_tasks_touch_sets_delete AFTER DELETE ON homework_tasks
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION touch_homework_sets_from_tasks();
@@ -0,0 +1,20 @@
+-- Назначения ДЗ группам: статистика группы смотрит только на свои наборы, а не на всю историю студентов
+CREATE TABLE group_assignments (
+    id SERIAL PRIMARY KEY,
+    group_id INTEGER NOT NULL REFERENCES groups(id),
+    set_id INTEGER NOT NULL REFERENCES homework_sets(id),
+    assigned_by INTEGER REFERENCES users(id),
+    assigned_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(group_id, set_id)
+);
+
+CREATE INDEX idx_group_assignments_set_id ON group_assignments(set_id);
+
+-- Перенос уже сделанных назначений: набор учителя группы, по которому у её студентов есть варианты
+INSERT INTO group_assignments (group_id, set_id, assigned_by, assigned_at)
+SELECT e.group_id, hv.set_id, g.teacher_id, MIN(hv.created_at)
+FROM homework_variants hv
+JOIN enrollments e ON e.student_id = hv.student_id
+JOIN groups g ON g.id = e.group_id
+JOIN homework_sets hs ON hs.id = hv.set_id AND hs.created_by = g.teacher_id
+GROUP BY e.group_id, hv.set_id, g.teacher_id;
@@ -0,0 +1,7 @@
+-- Дата зачисления: addStudentToGroup возвращает её, getGroupStudents сортирует по ней состав группы
+ALTER TABLE enrollments ADD COLUMN IF NOT EXISTS enrolled_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP;
+
+-- assignHomeworkToGroup создаёт варианты со статусом 'assigned', кабинет студента показывает их как активные
+ALTER TABLE homework_variants DROP CONSTRAINT IF EXISTS homework_variants_status_check;
+ALTER TABLE homework_variants ADD CONSTRAINT homework_variants_status_check
+    CHECK (status IN ('assigned', 'not_started', 'in_progress', 'submitted', 'checked'));
@@ -0,0 +1,5 @@
+-- Ключ постраничной выдачи getTeacherTasks — (created_at, id): строка с NULL выпадала из выборки по курсору
+-- и ломала построение курсора. Дата изменения — лучшее известное время для таких строк.
+UPDATE tasks SET created_at = updated_at WHERE created_at IS NULL;
+
+ALTER TABLE tasks ALTER COLUMN created_at SET NOT NULL;
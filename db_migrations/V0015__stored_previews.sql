@@ -0,0 +1,9 @@
+-- Режим fields=summary в getTeacherTasks и getTeacherTheory: начало текста и его размер хранятся в строке,
+-- чтобы список не читал полный текст из TOAST
+ALTER TABLE tasks
+    ADD COLUMN text_preview TEXT GENERATED ALWAYS AS (LEFT(text, 200)) STORED,
+    ADD COLUMN text_bytes INTEGER GENERATED ALWAYS AS (octet_length(text)) STORED;
+
+ALTER TABLE theory
+    ADD COLUMN content_preview TEXT GENERATED ALWAYS AS (LEFT(content, 200)) STORED,
+    ADD COLUMN content_bytes INTEGER GENERATED ALWAYS AS (octet_length(content)) STORED;
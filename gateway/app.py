@@ -0,0 +1,317 @@
+import asyncio
+import base64
+import importlib.util
+import json
+import os
+import sys
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from types import ModuleType
+from typing import Dict, Any, List, Optional, Tuple, Callable, Iterator
+from urllib.parse import parse_qsl
+
+from psycopg2.pool import ThreadedConnectionPool
+
+BACKEND_DIR = os.environ.get(
+    'GATEWAY_BACKEND_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+)
+GATEWAY_THREADS = int(os.environ.get('GATEWAY_THREADS', '16'))
+GATEWAY_MAX_STREAMS = int(os.environ.get('GATEWAY_MAX_STREAMS', '4'))
+GATEWAY_DB_POOL_MAX = int(os.environ.get('GATEWAY_DB_POOL_MAX', str(GATEWAY_THREADS + GATEWAY_MAX_STREAMS)))
+MAX_BODY_BYTES = int(os.environ.get('GATEWAY_MAX_BODY_BYTES', str(10 * 1024 * 1024)))
+
+SHARED_STATE_ATTRS = ['_token_cache', '_token_cache_lock', '_request_stats', '_prepared_queries']
+
+class FunctionContext:
+    '''
+    Business: Minimal stand-in for the cloud function context object
+    Args: function_name of the invoked backend function, stream_slots shared by the worker
+    Returns: object with request_id, function_name and supports_streaming attributes
+    '''
+    def __init__(self, function_name: str, stream_slots: threading.BoundedSemaphore):
+        self.request_id = str(uuid.uuid4())
+        self.function_name = function_name
+        self.stream_slots = stream_slots
+        self.holds_stream_slot = False
+
+    @property
+    def supports_streaming(self) -> bool:
+        '''
+        Business: Let a handler return an iterator body only while a stream slot is free
+        Args: none
+        Returns: True when a slot is taken for this request, it stays taken until release_stream_slot
+        '''
+        if not self.holds_stream_slot:
+            self.holds_stream_slot = self.stream_slots.acquire(blocking=False)
+        return self.holds_stream_slot
+
+    def release_stream_slot(self) -> None:
+        if self.holds_stream_slot:
+            self.holds_stream_slot = False
+            self.stream_slots.release()
+
+def load_functions(backend_dir: str) -> Dict[str, ModuleType]:
+    '''
+    Business: Import every backend/<name>/index.py that exposes handler
+    Args: backend_dir with one directory per function
+    Returns: dict of function name to imported module
+    '''
+    modules: Dict[str, ModuleType] = {}
+    for name in sorted(os.listdir(backend_dir)):
+        path = os.path.join(backend_dir, name, 'index.py')
+        if not os.path.isfile(path):
+            continue
+
+        spec = importlib.util.spec_from_file_location(f'backend_{name}', path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = module
+        spec.loader.exec_module(module)
+
+        if callable(getattr(module, 'handler', None)):
+            modules[name] = module
+    return modules
+
+def build_routes(modules: Dict[str, ModuleType], backend_dir: str) -> Dict[str, Tuple[str, Callable]]:
+    '''
+    Business: Map /<name> and /<function id> from func2url.json to handlers
+    Args: modules from load_functions, backend_dir containing func2url.json
+    Returns: dict of first path segment to (function name, handler)
+    '''
+    routes: Dict[str, Tuple[str, Callable]] = {name: (name, module.handler) for name, module in modules.items()}
+
+    func2url_path = os.path.join(backend_dir, 'func2url.json')
+    if os.path.isfile(func2url_path):
+        with open(func2url_path) as func2url_file:
+            func2url: Dict[str, str] = json.load(func2url_file)
+        for name, url in func2url.items():
+            if name in modules:
+                routes[url.rstrip('/').rsplit('/', 1)[-1]] = (name, modules[name].handler)
+    return routes
+
+def share_worker_state(modules: Dict[str, ModuleType], database_url: Optional[str]) -> Optional[ThreadedConnectionPool]:
+    '''
+    Business: Make all handlers in this worker use one connection pool, token cache and query stats slot
+    Args: modules from load_functions, database_url for the shared pool
+    Returns: the shared pool, or None when DATABASE_URL is not configured
+    '''
+    connection_factory = next((module.InstrumentedConnection for module in modules.values()
+                               if hasattr(module, 'InstrumentedConnection')), None)
+    pool = ThreadedConnectionPool(1, GATEWAY_DB_POOL_MAX, database_url, connection_factory=connection_factory) if database_url else None
+    last_used: Dict[int, float] = {}
+    shared: Dict[str, Any] = {}
+
+    for module in modules.values():
+        if pool is not None and hasattr(module, '_db_pool'):
+            module._db_pool = pool
+            module._db_last_used = last_used
+        for attr in SHARED_STATE_ATTRS:
+            if hasattr(module, attr):
+                setattr(module, attr, shared.setdefault(attr, getattr(module, attr)))
+    return pool
+
+def is_stream(result: Any) -> bool:
+    body = result.get('body') if isinstance(result, dict) else None
+    return body is not None and not isinstance(body, (str, bytes))
+
+def read_stream(chunks: Iterator[bytes]) -> Optional[bytes]:
+    '''
+    Business: Read the next chunk of a streamed body in a worker thread
+    Args: chunks iterator returned as body by a handler
+    Returns: next chunk, None when the body is complete
+    '''
+    return next(chunks, None)
+
+def close_stream(chunks: Iterator[bytes]) -> None:
+    close = getattr(chunks, 'close', None)
+    if close is not None:
+        close()
+
+def build_event(scope: Dict[str, Any], body: bytes) -> Dict[str, Any]:
+    '''
+    Business: Convert ASGI HTTP scope and body into the cloud function event dict
+    Args: scope of the HTTP request, body bytes read from the client
+    Returns: event with httpMethod, headers, queryStringParameters, body and isBase64Encoded
+    '''
+    headers: Dict[str, str] = {}
+    for raw_name, raw_value in scope.get('headers', []):
+        headers[raw_name.decode('latin-1').lower()] = raw_value.decode('latin-1')
+
+    query = parse_qsl(scope.get('query_string', b'').decode('latin-1'), keep_blank_values=True)
+    query_params = dict(query) if query else None
+
+    # Handlers parse the body with json.loads(event.get('body', '{}')), so an empty body is sent as '{}'
+    body_text = '{}'
+    is_base64 = False
+    if body:
+        try:
+            body_text = body.decode('utf-8')
+        except UnicodeDecodeError:
+            body_text = base64.b64encode(body).decode()
+            is_base64 = True
+
+    return {
+        'httpMethod': scope['method'],
+        'path': scope.get('path', '/'),
+        'headers': headers,
+        'queryStringParameters': query_params,
+        'body': body_text,
+        'isBase64Encoded': is_base64
+    }
+
+def encode_response(result: Dict[str, Any]) -> Tuple[int, List[Tuple[bytes, bytes]], bytes]:
+    '''
+    Business: Convert handler response dict into ASGI status, headers and body
+    Args: result returned by a backend handler
+    Returns: (status code, header pairs, body bytes)
+    '''
+    body = result.get('body') or ''
+    if result.get('isBase64Encoded'):
+        body_bytes = base64.b64decode(body)
+    else:
+        body_bytes = body.encode('utf-8') if isinstance(body, str) else bytes(body)
+
+    headers = [(str(name).lower().encode('latin-1'), str(value).encode('latin-1')) for name, value in (result.get('headers') or {}).items()]
+    headers.append((b'content-length', str(len(body_bytes)).encode()))
+    return int(result.get('statusCode', 200)), headers, body_bytes
+
+class Gateway:
+    '''
+    Business: ASGI application serving all backend functions from one process
+    Args: backend_dir with function directories
+    Returns: ASGI callable for uvicorn or gunicorn with uvicorn workers
+    '''
+    def __init__(self, backend_dir: str = BACKEND_DIR):
+        self.backend_dir = backend_dir
+        self.modules = load_functions(backend_dir)
+        self.routes = build_routes(self.modules, backend_dir)
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.pool: Optional[ThreadedConnectionPool] = None
+        self.stream_slots = threading.BoundedSemaphore(GATEWAY_MAX_STREAMS)
+
+    def startup(self) -> None:
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=GATEWAY_THREADS, thread_name_prefix='handler')
+            self.pool = share_worker_state(self.modules, os.environ.get('DATABASE_URL'))
+
+    def shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        if self.pool is not None:
+            self.pool.closeall()
+            self.pool = None
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        self.startup()
+
+        segments = [segment for segment in scope.get('path', '/').split('/') if segment]
+        if segments == ['healthz']:
+            await self.send_json(send, 200, {'status': 'ok', 'functions': sorted(self.modules)})
+            return
+
+        route = self.routes.get(segments[0]) if segments else None
+        if route is None:
+            await self.send_json(send, 404, {'error': 'Function not found'})
+            return
+
+        body = b''
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get('body', b'')
+            more_body = message.get('more_body', False)
+            if len(body) > MAX_BODY_BYTES:
+                await self.send_json(send, 413, {'error': 'Request body too large'})
+                return
+
+        function_name, handler = route
+        event = build_event(scope, body)
+        context = FunctionContext(function_name, self.stream_slots)
+        try:
+            await self.respond(send, handler, event, context)
+        finally:
+            context.release_stream_slot()
+
+    async def respond(self, send: Callable, handler: Callable, event: Dict[str, Any], context: FunctionContext) -> None:
+        '''
+        Business: Run a handler in a worker thread and send its response, buffered or streamed
+        Args: send of the ASGI connection, handler and event for it, context of the request
+        Returns: None, a streamed body keeps the stream slot of context until it is sent
+        '''
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(self.executor, handler, event, context)
+        except Exception as error:
+            print(json.dumps({'function': context.function_name, 'error': repr(error)}), file=sys.stderr)
+            await self.send_json(send, 500, {'error': 'Internal server error'})
+            return
+
+        if is_stream(result):
+            await self.send_stream(send, context.function_name, result)
+            return
+
+        context.release_stream_slot()
+        status, headers, body_bytes = encode_response(result)
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body_bytes})
+
+    async def send_stream(self, send: Callable, function_name: str, result: Dict[str, Any]) -> None:
+        '''
+        Business: Send a handler body given as an iterator of byte chunks as they are produced
+        Args: send of the ASGI connection, function_name for error logs, result with iterator body
+        Returns: None, on a failure mid-body the response is left incomplete so the client sees it
+        '''
+        chunks = result['body']
+        headers = [(str(name).lower().encode('latin-1'), str(value).encode('latin-1')) for name, value in (result.get('headers') or {}).items()]
+        loop = asyncio.get_running_loop()
+        completed = False
+
+        try:
+            await send({'type': 'http.response.start', 'status': int(result.get('statusCode', 200)), 'headers': headers})
+            while True:
+                chunk = await loop.run_in_executor(self.executor, read_stream, chunks)
+                if chunk is None:
+                    break
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            completed = True
+        except Exception as error:
+            print(json.dumps({'function': function_name, 'error': repr(error)}), file=sys.stderr)
+        finally:
+            await loop.run_in_executor(self.executor, close_stream, chunks)
+
+        if completed:
+            await send({'type': 'http.response.body', 'body': b''})
+
+    async def lifespan(self, receive: Callable, send: Callable) -> None:
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self.startup()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def send_json(self, send: Callable, status: int, data: Any) -> None:
+        body = json.dumps(data).encode()
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'access-control-allow-origin', b'*'),
+                (b'content-length', str(len(body)).encode())
+            ]
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+app = Gateway()